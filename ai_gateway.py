@@ -0,0 +1,145 @@
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+
+MAX_WORKERS = 8
+# Requests running or waiting for a worker; beyond this new ones are shed.
+MAX_PENDING = 32
+RATE_PER_SECOND = 5.0
+BURST = 10
+REQUEST_TIMEOUT_SECONDS = 30.0
+MAX_RETRIES = 2
+RETRY_BASE_DELAY_SECONDS = 0.5
+
+BUSY_MESSAGE = "🌊 The coach is busy right now. Take a slow breath and try again in a moment."
+TIMEOUT_MESSAGE = "🌊 The coach is taking too long to answer. Please try again in a moment."
+
+class GatewayOverloaded(Exception):
+    # Raised instead of waiting when the request cannot be served in time;
+    # the message is safe to show to the user as-is.
+    pass
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, deadline):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+class Gateway:
+    # Shared front door for AI calls: a bounded worker pool, a global token
+    # bucket, a deadline per request and jittered retries before the first chunk.
+
+    def __init__(
+        self,
+        max_workers=MAX_WORKERS,
+        max_pending=MAX_PENDING,
+        rate_per_second=RATE_PER_SECOND,
+        burst=BURST,
+        timeout_seconds=REQUEST_TIMEOUT_SECONDS,
+        max_retries=MAX_RETRIES,
+    ):
+        self.timeout_seconds = timeout_seconds
+        self.max_retries = max_retries
+        self.bucket = TokenBucket(rate_per_second, burst)
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="ai-gateway")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._counts_lock = threading.Lock()
+        self.counts = {"requests": 0, "shed": 0, "timeouts": 0, "retries": 0, "errors": 0}
+
+    def _count(self, name):
+        with self._counts_lock:
+            self.counts[name] += 1
+        metrics.increment(f"ai_gateway_{name}")
+
+    def _run(self, attempt, deadline, out, cancelled):
+        try:
+            for n in range(self.max_retries + 1):
+                # A job can sit in the executor queue, or its caller can time
+                # out, before it gets here; nobody is waiting for it then.
+                if cancelled.is_set() or time.monotonic() >= deadline:
+                    return
+                if not self.bucket.acquire(deadline):
+                    out.put(("busy", None))
+                    return
+                if cancelled.is_set():
+                    return
+                emitted = False
+                try:
+                    for chunk in attempt(deadline - time.monotonic()):
+                        if cancelled.is_set():
+                            return
+                        emitted = True
+                        out.put(("chunk", chunk))
+                    out.put(("done", None))
+                    return
+                except Exception as e:
+                    # Once text has reached the user a retry would repeat it.
+                    delay = RETRY_BASE_DELAY_SECONDS * 2 ** n * random.uniform(0.5, 1.5)
+                    if (
+                        emitted
+                        or n == self.max_retries
+                        or cancelled.is_set()
+                        or time.monotonic() + delay >= deadline
+                    ):
+                        out.put(("error", e))
+                        return
+                    self._count("retries")
+                    if cancelled.wait(delay):
+                        return
+        finally:
+            self._slots.release()
+
+    def stream(self, attempt, timeout_seconds=None):
+        # attempt(timeout) makes one provider call, bounded by the seconds left
+        # before the deadline, and returns an iterable of text chunks.
+        self._count("requests")
+        if not self._slots.acquire(blocking=False):
+            self._count("shed")
+            raise GatewayOverloaded(BUSY_MESSAGE)
+        deadline = time.monotonic() + (timeout_seconds or self.timeout_seconds)
+        out = queue.Queue()
+        cancelled = threading.Event()
+        self._executor.submit(self._run, attempt, deadline, out, cancelled)
+        try:
+            while True:
+                try:
+                    kind, value = out.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    self._count("timeouts")
+                    raise GatewayOverloaded(TIMEOUT_MESSAGE)
+                if kind == "chunk":
+                    yield value
+                elif kind == "done":
+                    return
+                elif kind == "busy":
+                    self._count("shed")
+                    raise GatewayOverloaded(BUSY_MESSAGE)
+                else:
+                    self._count("errors")
+                    raise value
+        finally:
+            cancelled.set()
+
+    def stats(self):
+        with self._counts_lock:
+            return dict(self.counts)
@@ -1,21 +1,66 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
 import streamlit as st
-import google.generativeai as genai
-try:
-    GEMINI_API_KEY = st.secrets["GEMINI_API_KEY"]
-except KeyError:
-    GEMINI_API_KEY = None
-    print("Warning: GEMINI_API_KEY not found in secrets.")
-
-try:
-    if GEMINI_API_KEY:
-        genai.configure(api_key=GEMINI_API_KEY)
-        ai_model = genai.GenerativeModel("gemini-2.5-flash-lite")
-        ai_available = True
-    else:
-        ai_available = False
-except Exception as e:
-    ai_available = False
-    print(f"AI Setup Error: {e}")
+from ai_cache import make_cache, make_key
+from ai_gateway import Gateway, GatewayOverloaded
+from chat_context import CONTEXT_TOKEN_BUDGET, build_context, estimate_tokens
+import metrics
+
+# The Gemini SDK is imported and configured on the first chat message rather
+# than at import time; None means "not set up yet".
+ai_model = None
+ai_available = None
+_setup_lock = threading.Lock()
+
+def _ensure_ai_model():
+    global ai_model, ai_available
+    if ai_available is not None:
+        return ai_available
+    with _setup_lock:
+        if ai_available is not None:
+            return ai_available
+        try:
+            GEMINI_API_KEY = st.secrets["GEMINI_API_KEY"]
+        except (KeyError, FileNotFoundError):
+            GEMINI_API_KEY = None
+            print("Warning: GEMINI_API_KEY not found in secrets.")
+
+        try:
+            if GEMINI_API_KEY:
+                import google.generativeai as genai
+
+                genai.configure(api_key=GEMINI_API_KEY)
+                ai_model = genai.GenerativeModel("gemini-2.5-flash-lite")
+                ai_available = True
+            else:
+                ai_available = False
+        except Exception as e:
+            ai_available = False
+            print(f"AI Setup Error: {e}")
+    return ai_available
+
+# "memory" (per process) or "sqlite" (shared file, survives restarts).
+AI_CACHE_BACKEND = os.environ.get("RHYTHM_AI_CACHE", "memory")
+response_cache = make_cache(AI_CACHE_BACKEND)
+metrics.register_cache("ai_response", response_cache.stats)
+# Every model call in the process goes through this pool and rate limit.
+gateway = Gateway()
+
+# Live chat sessions are kept per browser session and reused across turns.
+MAX_CHAT_SESSIONS = 500
+_sessions = OrderedDict()
+_sessions_lock = threading.Lock()
+
+def set_ai_model(model):
+    # Swap in another backend, e.g. ai_stub.StubModel for offline testing.
+    global ai_model, ai_available
+    ai_model = model
+    ai_available = model is not None
+    with _sessions_lock:
+        _sessions.clear()
 
 SYSTEM_CONTEXT = """
 You are Rhythm Anchor, a smart, encouraging, and action-oriented wellness coach. 🧠✨ 
@@ -26,21 +71,102 @@ Your goal is to help users improve sleep, reduce screen time, and lower stress w
 - Keep it short.
 """
 
-def get_ai_response(user_input, chat_history):
-    if not ai_available:
-        return "⚠️ Gemini API Key is missing or invalid. Please check your .streamlit/secrets.toml file."
+MISSING_KEY_MESSAGE = "⚠️ Gemini API Key is missing or invalid. Please check your .streamlit/secrets.toml file."
+
+def _build_history(chat_history, summary=""):
+    # Returns the Gemini history and its estimated token count.
+    summary, recent = build_context(chat_history, summary)
+    system = SYSTEM_CONTEXT
+    if summary:
+        system += f"\nEarlier in this conversation:\n{summary}\n"
+    history_for_gemini = []
+    history_for_gemini.append({"role": "user", "parts": [system]})
+    history_for_gemini.append(
+        {"role": "model", "parts": ["Understood. I am Rhythm Anchor."]}
+    )
+    tokens = estimate_tokens(summary)
+    for msg in recent:
+        role = "user" if msg["role"] == "user" else "model"
+        history_for_gemini.append({"role": role, "parts": [msg["text"]]})
+        tokens += estimate_tokens(msg["text"])
+    return history_for_gemini, tokens
+
+def _checkout_chat(session_id, chat_history, summary=""):
+    # A session is taken out of the pool while in use, so two tabs of the same
+    # user never send on one chat at once. It is rebuilt when the app-side
+    # history has diverged (e.g. a cached reply the chat never saw, or the
+    # history was compacted) or when its context has grown past the token budget.
+    with _sessions_lock:
+        entry = _sessions.pop(session_id, None)
+    n = len(chat_history)
+    if (
+        entry is None
+        or entry["synced"] != n
+        or entry["summary"] != summary
+        or entry["tokens"] > CONTEXT_TOKEN_BUDGET
+    ):
+        history, tokens = _build_history(chat_history, summary)
+        entry = {
+            "chat": ai_model.start_chat(history=history),
+            "synced": n,
+            "summary": summary,
+            "tokens": tokens,
+        }
+    return entry
+
+def _checkin_chat(session_id, entry):
+    with _sessions_lock:
+        _sessions[session_id] = entry
+        _sessions.move_to_end(session_id)
+        while len(_sessions) > MAX_CHAT_SESSIONS:
+            _sessions.popitem(last=False)
+
+def stream_ai_response(user_input, chat_history, session_id="default", summary=""):
+    # summary is the rolling summary of turns already compacted out of chat_history.
+    if not _ensure_ai_model():
+        yield MISSING_KEY_MESSAGE
+        return
+    key = make_key(user_input, chat_history)
+    cached = response_cache.get(key)
+    if cached is not None:
+        yield cached
+        return
+    prior = list(chat_history)
+    # views appends the prompt before asking; the chat receives it via send_message.
+    if prior and prior[-1]["role"] == "user" and prior[-1]["text"] == user_input:
+        prior = prior[:-1]
+    state = {}
+
+    def attempt(timeout):
+        # A retry checks out again, which builds a fresh chat since the failed
+        # one was never returned to the pool. The timeout keeps a hung provider
+        # call from holding a gateway worker past the request's deadline.
+        state["entry"] = _checkout_chat(session_id, prior, summary)
+        chat = state["entry"]["chat"]
+        for chunk in chat.send_message(user_input, stream=True, request_options={"timeout": timeout}):
+            if chunk.text:
+                yield chunk.text
+
+    timing = metrics.sampled()
+    start = time.perf_counter()
     try:
-        history_for_gemini = []
-        history_for_gemini.append({"role": "user", "parts": [SYSTEM_CONTEXT]})
-        history_for_gemini.append(
-            {"role": "model", "parts": ["Understood. I am Rhythm Anchor."]}
-        )
-        for msg in chat_history[-10:]:
-            role = "user" if msg["role"] == "user" else "model"
-            history_for_gemini.append({"role": role, "parts": [msg["text"]]})
-
-        chat = ai_model.start_chat(history=history_for_gemini)
-        response = chat.send_message(user_input)
-        return response.text
+        parts = []
+        for text in gateway.stream(attempt):
+            if timing and not parts:
+                metrics.observe("ai_first_chunk", (time.perf_counter() - start) * 1000)
+            parts.append(text)
+            yield text
+        if timing:
+            metrics.observe("ai_response", (time.perf_counter() - start) * 1000)
+        reply = "".join(parts)
+        response_cache.set(key, reply)
+        state["entry"]["synced"] = len(prior) + 2
+        state["entry"]["tokens"] += estimate_tokens(user_input) + estimate_tokens(reply)
+        _checkin_chat(session_id, state["entry"])
+    except GatewayOverloaded as e:
+        yield str(e)
     except Exception as e:
-        return f"AI Error: {str(e)}"
+        yield f"AI Error: {str(e)}"
+
+def get_ai_response(user_input, chat_history, session_id="default", summary=""):
+    return "".join(stream_ai_response(user_input, chat_history, session_id, summary))
@@ -0,0 +1,60 @@
+# Local stand-in for google.generativeai.GenerativeModel, for exercising the AI
+# coach without network access or an API key:
+#     ai_service.set_ai_model(StubModel(latency=0.8, chunk_delay=0.02))
+# latency is slept before the first chunk; fail_first makes the first N calls
+# raise, to exercise retries.
+
+import threading
+import time
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+class StubChat:
+    def __init__(self, model, history):
+        self.model = model
+        self.history = list(history or [])
+
+    def send_message(self, content, stream=False, request_options=None):
+        self.model.before_call()
+        text = self.model.reply(content)
+        self.history.append({"role": "user", "parts": [content]})
+        self.history.append({"role": "model", "parts": [text]})
+        if stream:
+            return self._stream(text)
+        return StubResponse(text)
+
+    def _stream(self, text):
+        # Word-sized chunks, roughly how Gemini streams tokens.
+        words = text.split(" ")
+        for i, word in enumerate(words):
+            if i and self.model.chunk_delay:
+                time.sleep(self.model.chunk_delay)
+            yield StubResponse(word if i == len(words) - 1 else word + " ")
+
+class StubModel:
+    def __init__(self, replies=None, latency=0.0, chunk_delay=0.0, fail_first=0):
+        self.replies = replies or {}
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self.fail_first = fail_first
+        self.calls = 0
+        self.chats_started = 0
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            self.calls += 1
+            failing = self.calls <= self.fail_first
+        if self.latency:
+            time.sleep(self.latency)
+        if failing:
+            raise RuntimeError("Stub model unavailable")
+
+    def reply(self, content):
+        return self.replies.get(content, f"🌿 **Stub coach:** {content}")
+
+    def start_chat(self, history=None):
+        self.chats_started += 1
+        return StubChat(self, history)
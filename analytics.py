@@ -1,71 +1,176 @@
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import IsolationForest
+from forest_scorer import CompiledForest
+
+FEATURE_COLUMNS = ["snooze_delta", "daily_steps", "app_switch_rate", "pickup_count"]
+
+LIFESTYLE_PENALTIES = {
+    "Smoking": (5, "Lifestyle (Smoking)"),
+    "High Stress Work": (5, "High Stress Environment"),
+    "Regular Alcohol": (5, "Alcohol Consumption"),
+}
+
+SYMPTOM_WEIGHTS = {
+    "Fatigue": 10,
+    "Insomnia": 15,
+    "Anxiety": 15,
+    "Palpitations": 20,
+    "Headache": 5,
+}
+# Penalty for each symptom not listed in SYMPTOM_WEIGHTS.
+OTHER_SYMPTOM_WEIGHT = 5
+OTHER_SYMPTOMS_REASON = "Symptom (other)"
+
+# Bit order of the batch reason codes: lifestyle reasons, then symptoms in
+# SYMPTOM_WEIGHTS order, then one bit for any other symptom. decode_reason_codes
+# returns reasons in this order, so it equals the scalar reasons list when the
+# caller passes symptoms in SYMPTOM_WEIGHTS order; otherwise compare as sets.
+# Symptoms outside SYMPTOM_WEIGHTS have no column of their own, so the batch
+# reports them all as OTHER_SYMPTOMS_REASON.
+REASON_CODES = (
+    [reason for _, reason in LIFESTYLE_PENALTIES.values()]
+    + [f"Symptom ({sym})" for sym in SYMPTOM_WEIGHTS]
+    + [OTHER_SYMPTOMS_REASON]
+)
 
 def calculate_hybrid_stability(ai_score, lifestyle_factors, symptoms, age):
     base_stability = int(max(0, min(100, (ai_score + 0.5) * 100)))
     penalties = 0
     reasons = []
     
-    if "Smoking" in lifestyle_factors:
-        penalties += 5
-        reasons.append("Lifestyle (Smoking)")
-    if "High Stress Work" in lifestyle_factors:
-        penalties += 5
-        reasons.append("High Stress Environment")
-    if "Regular Alcohol" in lifestyle_factors:
-        penalties += 5
-        reasons.append("Alcohol Consumption")
+    for factor, (penalty, reason) in LIFESTYLE_PENALTIES.items():
+        if factor in lifestyle_factors:
+            penalties += penalty
+            reasons.append(reason)
     if age > 60:
         penalties += 2
         
-    symptom_weights = {
-        "Fatigue": 10,
-        "Insomnia": 15,
-        "Anxiety": 15,
-        "Palpitations": 20,
-        "Headache": 5,
-    }
-    
     for sym in symptoms:
-        penalties += symptom_weights.get(sym, 5)
+        penalties += SYMPTOM_WEIGHTS.get(sym, OTHER_SYMPTOM_WEIGHT)
         reasons.append(f"Symptom ({sym})")
         
     return max(0, base_stability - penalties), base_stability, reasons
 
-def generate_baseline(days=30):
-    np.random.seed(42)
+def calculate_hybrid_stability_batch(data, ai_scores=None):
+    # data: DataFrame or dict of equal-length columns. Feature columns are only
+    # needed when ai_scores is not given; lifestyle factors and symptoms are
+    # boolean columns named after the factor/symptom, plus "age" and
+    # "other_symptoms" (how many symptoms outside SYMPTOM_WEIGHTS) columns.
+    # Stability and base match calculate_hybrid_stability exactly; see
+    # REASON_CODES for how the reasons compare.
+    df = pd.DataFrame(data)
+    n = len(df)
+    if ai_scores is None:
+        ai_scores = get_scorer().decision_function(df[FEATURE_COLUMNS])
+    ai_scores = np.asarray(ai_scores, dtype=float)
+
+    base_stability = np.clip((ai_scores + 0.5) * 100, 0, 100).astype(np.int64)
+    penalties = np.zeros(n, dtype=np.int64)
+    reason_codes = np.zeros(n, dtype=np.int64)
+    bit = 0
+
+    for factor, (penalty, _) in LIFESTYLE_PENALTIES.items():
+        if factor in df:
+            flags = df[factor].to_numpy(dtype=bool)
+            penalties += penalty * flags
+            reason_codes |= flags.astype(np.int64) << bit
+        bit += 1
+    if "age" in df:
+        penalties += 2 * (df["age"].to_numpy() > 60)
+
+    for sym, weight in SYMPTOM_WEIGHTS.items():
+        if sym in df:
+            flags = df[sym].to_numpy(dtype=bool)
+            penalties += weight * flags
+            reason_codes |= flags.astype(np.int64) << bit
+        bit += 1
+    if "other_symptoms" in df:
+        counts = df["other_symptoms"].to_numpy(dtype=np.int64)
+        penalties += OTHER_SYMPTOM_WEIGHT * counts
+        reason_codes |= (counts > 0).astype(np.int64) << bit
+
+    return np.maximum(0, base_stability - penalties), base_stability, reason_codes
+
+def decode_reason_codes(code):
+    return [reason for bit, reason in enumerate(REASON_CODES) if code >> bit & 1]
+
+def generate_baseline(days=30, seed=42):
+    # RandomState reproduces the original np.random.seed stream without
+    # touching the global RNG.
+    rng = np.random.RandomState(seed)
     return pd.DataFrame(
         {
-            "snooze_delta": np.random.normal(0.5, 0.2, days),
-            "daily_steps": np.random.normal(7000, 800, days),
-            "app_switch_rate": np.random.normal(40, 5, days),
-            "pickup_count": np.random.normal(80, 10, days),
+            "snooze_delta": rng.normal(0.5, 0.2, days),
+            "daily_steps": rng.normal(7000, 800, days),
+            "app_switch_rate": rng.normal(40, 5, days),
+            "pickup_count": rng.normal(80, 10, days),
         }
     )
 
+def spawn_batch_seeds(seed, n_batches):
+    # Independent child seeds, one per batch, so workers never share a stream.
+    return np.random.SeedSequence(seed).spawn(n_batches)
+
+def generate_day_batch(n_days, seed=None):
+    # (n_days, len(FEATURE_COLUMNS)) float array in FEATURE_COLUMNS order.
+    rng = np.random.default_rng(seed)
+    means = np.array([0.5, 7000, 40, 80])
+    scales = np.array([0.2, 800, 5, 10])
+    return rng.standard_normal((n_days, len(FEATURE_COLUMNS))) * scales + means
+
+def generate_scroll_batch(n_sessions, intensity, erraticness, duration_seconds=60, seed=None):
+    # (n_sessions, duration_seconds) velocities. intensity and erraticness are
+    # scalars or one value per session.
+    rng = np.random.default_rng(seed)
+    shape = (n_sessions, duration_seconds)
+    intensity = np.broadcast_to(np.asarray(intensity, dtype=float).reshape(-1, 1), (n_sessions, 1))
+    erraticness = np.broadcast_to(np.asarray(erraticness, dtype=float).reshape(-1, 1), (n_sessions, 1))
+
+    # Each branch is drawn only for the sessions whose intensity selects it,
+    # and written into one preallocated output.
+    out = np.empty(shape)
+    calm_rows = intensity[:, 0] < 300
+    n_calm = int(calm_rows.sum())
+    if n_calm:
+        idle = rng.random((n_calm, duration_seconds)) > 0.3
+        calm = rng.integers(50, 400, (n_calm, duration_seconds)).astype(float)
+        calm[idle] = 0
+        out[calm_rows] = calm
+    if n_calm < n_sessions:
+        erratic_rows = ~calm_rows
+        erratic = rng.standard_normal((n_sessions - n_calm, duration_seconds))
+        erratic *= erraticness[erratic_rows] * 5
+        erratic += intensity[erratic_rows]
+        out[erratic_rows] = np.abs(erratic, out=erratic)
+    return out
+
+def get_model():
+    # The fitted forest lives in the model registry and is loaded on first use,
+    # so importing this module never pays for training.
+    from model_registry import get_model as registry_model
+    return registry_model()
+
+_scorer = None
+
+def get_scorer():
+    # Recompiled only when the registry hands back a different model.
+    global _scorer
+    forest = get_model()
+    if _scorer is None or _scorer.model is not forest:
+        _scorer = CompiledForest(forest)
+    return _scorer
+
 def train_isolation_forest(baseline_df):
     model = IsolationForest(n_estimators=100, contamination=0.1, random_state=42)
     model.fit(baseline_df)
     return model
 
 def generate_scroll_pattern(intensity, erraticness, duration_seconds=60):
-    np.random.seed(42)
-    time_points = range(duration_seconds)
-    if intensity < 300:
-        velocities = [
-            0 if np.random.random() > 0.3 else np.random.randint(50, 400)
-            for _ in time_points
-        ]
-    else:
-        base = np.full(duration_seconds, intensity)
-        noise = np.random.normal(0, erraticness * 5, duration_seconds)
-        velocities = np.abs(base + noise)
-    return pd.DataFrame({"Seconds": time_points, "Velocity (px/s)": velocities})
+    velocities = generate_scroll_batch(1, intensity, erraticness, duration_seconds, seed=42)[0]
+    return pd.DataFrame({"Seconds": range(duration_seconds), "Velocity (px/s)": velocities})
 
-def detect_doomscrolling(df, current_time_obj):
-    avg_speed = df["Velocity (px/s)"].mean()
-    zero_crossings = (df["Velocity (px/s)"] == 0).sum()
+def _doomscroll_risk(avg_speed, zero_crossings, current_time_obj):
     is_late_night = current_time_obj.hour >= 22 or current_time_obj.hour <= 4
     risk_score = 0
     reasons = []
@@ -82,5 +187,70 @@ def detect_doomscrolling(df, current_time_obj):
         
     return min(100, risk_score), reasons
 
-baseline_df = generate_baseline()
-model = train_isolation_forest(baseline_df)
+def detect_doomscrolling(df, current_time_obj):
+    velocities = df["Velocity (px/s)"]
+    return _doomscroll_risk(velocities.mean(), (velocities == 0).sum(), current_time_obj)
+
+class DoomscrollMonitor:
+    # Online version of detect_doomscrolling over the last window_samples
+    # velocities, one per second like generate_scroll_pattern. A ring buffer
+    # keeps a running sum and zero-dwell count, so each sample is O(1). No risk
+    # is reported until the window is full: the zero-dwell rule assumes a whole
+    # window, and a partial one would always look like doomscrolling.
+
+    def __init__(self, window_samples=60):
+        self._buffer = np.zeros(window_samples)
+        self._head = 0
+        self._count = 0
+        self._sum = 0.0
+        self._zeros = 0
+        self.samples_seen = 0
+        self.risk = 0
+        self.reasons = []
+
+    def update(self, velocity, current_time_obj):
+        velocity = float(velocity)
+        if self._count == len(self._buffer):
+            old = self._buffer[self._head]
+            self._sum -= old
+            self._zeros -= old == 0
+        else:
+            self._count += 1
+        self._buffer[self._head] = velocity
+        self._sum += velocity
+        self._zeros += velocity == 0
+        self._head = (self._head + 1) % len(self._buffer)
+        if self._head == 0:
+            # Resync once per lap so float error cannot build up over long sessions.
+            self._sum = float(self._buffer.sum())
+        self.samples_seen += 1
+        if self._count < len(self._buffer):
+            return None
+
+        risk, reasons = _doomscroll_risk(self._sum / self._count, self._zeros, current_time_obj)
+        event = None
+        if risk != self.risk:
+            event = {
+                "sample": self.samples_seen - 1,
+                "previous_risk": self.risk,
+                "risk": risk,
+                "reasons": reasons,
+            }
+        self.risk, self.reasons = risk, reasons
+        return event
+
+    def extend(self, velocities, current_time_obj):
+        events = []
+        for velocity in velocities:
+            event = self.update(velocity, current_time_obj)
+            if event is not None:
+                events.append(event)
+        return events
+
+def __getattr__(name):
+    if name == "model":
+        return get_model()
+    if name == "baseline_df":
+        from model_registry import get_entry
+        return generate_baseline(**get_entry()["params"])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
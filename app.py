@@ -1,36 +1,35 @@
+import uuid
+
 import streamlit as st
+import metrics
 import views
 from styles import set_global_theme
 
 st.set_page_config(page_title="Rhythm Anchor", page_icon="🧠", layout="wide")
 
 if "page" not in st.session_state: st.session_state["page"] = "landing"
-if "history_log" not in st.session_state: st.session_state["history_log"] = []
-if "entry_counter" not in st.session_state: st.session_state["entry_counter"] = 1
 if "chat_history" not in st.session_state:
     st.session_state["chat_history"] = [{"role": "assistant", "text": "Hi! I'm your privacy-first wellness companion."}]
+if "chat_summary" not in st.session_state: st.session_state["chat_summary"] = ""
+# Identifies this browser session's pooled AI chat; two tabs of one user never share one.
+if "chat_session_id" not in st.session_state: st.session_state["chat_session_id"] = uuid.uuid4().hex
 if "logged_in" not in st.session_state: st.session_state["logged_in"] = False
 if "username" not in st.session_state: st.session_state["username"] = ""
 if "auth_mode" not in st.session_state: st.session_state["auth_mode"] = "Sign In"
 if "show_chat_window" not in st.session_state: st.session_state["show_chat_window"] = False
 if "show_account_window" not in st.session_state: st.session_state["show_account_window"] = False
 
-if "user_db" not in st.session_state:
-    st.session_state["user_db"] = {
-        "admin": {
-            "password": "1234",
-            "full_name": "System Administrator",
-            "age": 30,
-            "email": "admin@rhythmanchor.com",
-            "medical_history": "None",
-        }
-    }
-
 set_global_theme()
 
-if st.session_state["logged_in"]:
-    views.show_main_app()
-elif st.session_state["page"] == "landing":
-    views.show_landing_page()
-elif st.session_state["page"] == "login":
-    views.show_login_page()
+metrics.increment("reruns")
+with metrics.timed("rerun"):
+    if st.session_state["logged_in"]:
+        views.show_main_app()
+    elif st.session_state["page"] == "landing":
+        views.show_landing_page()
+    elif st.session_state["page"] == "login":
+        views.show_login_page()
+# Largest session seen by this process, so state growth in any session shows up.
+metrics.set_max("session_state_keys_max", len(st.session_state))
+metrics.set_max("session_chat_messages_max", len(st.session_state["chat_history"]))
+metrics.maybe_export()
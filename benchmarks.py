@@ -0,0 +1,200 @@
+import argparse
+import atexit
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Benchmarks run against throwaway storage so they never touch real data.
+_TMP = tempfile.mkdtemp(prefix="rhythm-bench-")
+atexit.register(shutil.rmtree, _TMP, ignore_errors=True)
+os.environ["RHYTHM_DB_PATH"] = os.path.join(_TMP, "bench.db")
+os.environ["RHYTHM_MODEL_DIR"] = os.path.join(_TMP, "models")
+os.environ["RHYTHM_AI_CACHE"] = "memory"
+
+from datetime import date, time as clock, timedelta
+
+import numpy as np
+import pandas as pd
+
+import ai_service
+import analytics
+import history_store
+from ai_gateway import Gateway
+from ai_stub import StubModel
+from import_probe import IMPORT_BUDGET_MS, probe_cold_import
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+BASELINE_PATH = "benchmarks_baseline.json"
+# Users in each synthetic population; every user gets DAYS_PER_USER saved days.
+POPULATIONS = {"small": 10, "medium": 100, "large": 1000}
+DAYS_PER_USER = 90
+# Changes smaller than this are timer noise, whatever the ratio says.
+NOISE_FLOOR_MS = 0.05
+NOISE_FLOOR_KIB = 64
+
+def _percentile(samples, q):
+    return float(np.percentile(samples, q)) if samples else 0.0
+
+def measure(fn, iterations, memory_iterations=3):
+    fn()  # warm-up: imports, first-use compilation, caches
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    # Timed separately because tracemalloc itself slows every allocation.
+    tracemalloc.start()
+    for _ in range(memory_iterations):
+        fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "p50_ms": _percentile(latencies, 50),
+        "p99_ms": _percentile(latencies, 99),
+        "peak_kib": peak / 1024,
+        "iterations": iterations,
+    }
+
+def populate(n_users, seed=0):
+    users = [f"bench{n_users}_{i:05d}" for i in range(n_users)]
+    start = date(2024, 1, 1)
+    days = [(start + timedelta(days=d)).isoformat() for d in range(DAYS_PER_USER)]
+    for user, child in zip(users, analytics.spawn_batch_seeds(seed, n_users)):
+        features = analytics.generate_day_batch(DAYS_PER_USER, child)
+        frame = pd.DataFrame(features, columns=analytics.FEATURE_COLUMNS)
+        stability, _, _ = analytics.calculate_hybrid_stability_batch(frame)
+        history_store.append_days(
+            user,
+            ((day, s, dict(zip(analytics.FEATURE_COLUMNS, row))) for day, s, row in zip(days, stability, features)),
+        )
+    return users
+
+def cold_import_benchmark(runs=5):
+    latencies, heavy = [], set()
+    for _ in range(runs):
+        probe = probe_cold_import()
+        latencies.append(probe["ms"])
+        heavy.update(probe["heavy"])
+    result = {
+        "p50_ms": _percentile(latencies, 50),
+        "p99_ms": _percentile(latencies, 99),
+        "peak_kib": 0.0,
+        "iterations": runs,
+    }
+    problems = []
+    if result["p50_ms"] > IMPORT_BUDGET_MS:
+        problems.append(f"landing page imports take {result['p50_ms']:.1f}ms, budget is {IMPORT_BUDGET_MS}ms")
+    if heavy:
+        problems.append(f"landing page imports heavy modules: {', '.join(sorted(heavy))}")
+    return result, problems
+
+def micro_benchmarks(iterations):
+    forest = analytics.get_model()
+    scorer = analytics.get_scorer()
+    row = {"snooze_delta": 1, "daily_steps": 7000, "app_switch_rate": 40, "pickup_count": 80}
+    row_df = pd.DataFrame([row])
+    scroll_df = analytics.generate_scroll_pattern(800, 20)
+    prompts = iter(range(10**9))
+
+    ai_service.set_ai_model(StubModel())
+    ai_service.gateway = Gateway(rate_per_second=1e9, burst=1e9)
+
+    return {
+        "calculate_hybrid_stability": measure(
+            lambda: analytics.calculate_hybrid_stability(0.1, ["Smoking"], ["Fatigue", "Anxiety"], 30), iterations
+        ),
+        "decision_function_sklearn": measure(lambda: forest.decision_function(row_df), max(20, iterations // 20)),
+        "decision_function_compiled": measure(lambda: scorer.score_one(row), iterations),
+        "generate_scroll_pattern": measure(lambda: analytics.generate_scroll_pattern(800, 20), iterations),
+        "detect_doomscrolling": measure(lambda: analytics.detect_doomscrolling(scroll_df, clock(23, 30)), iterations),
+        # Unique prompts, so every call misses the cache and goes through the gateway.
+        "ai_response_stub": measure(
+            lambda: ai_service.get_ai_response(f"question {next(prompts)}", [], "bench"), iterations // 10
+        ),
+    }
+
+def population_benchmarks(name, n_users, iterations):
+    from streamlit.testing.v1 import AppTest
+
+    users = populate(n_users)
+    frame = pd.concat(
+        pd.DataFrame(history_store.get_recent_days(user, DAYS_PER_USER)) for user in users[:50]
+    )[analytics.FEATURE_COLUMNS]
+    frame = pd.concat([frame] * max(1, n_users // 50), ignore_index=True)
+
+    at = AppTest.from_file(APP_PATH, default_timeout=120)
+    at.secrets["GEMINI_API_KEY"] = "benchmark"
+    at.run()
+    at.session_state["logged_in"] = True
+    at.session_state["username"] = users[n_users // 2]
+    at.run()
+    if at.exception:
+        raise RuntimeError(f"App raised during benchmark: {at.exception}")
+    steps = iter(range(10**9))
+
+    def rerun():
+        # A new steps value each time, as if the user were dragging the slider.
+        slider = next(s for s in at.slider if s.label == "👟 Daily Steps")
+        slider.set_value(1000 + next(steps) % 13000).run()
+
+    return {
+        f"batch_scoring[{name}]": measure(lambda: analytics.calculate_hybrid_stability_batch(frame), max(5, iterations // 100)),
+        f"history_recent_window[{name}]": measure(lambda: history_store.get_recent_days(users[0], 30), iterations),
+        f"show_main_app_rerun[{name}]": measure(rerun, max(10, iterations // 20)),
+    }
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for metric, floor in (("p50_ms", NOISE_FLOOR_MS), ("p99_ms", NOISE_FLOOR_MS), ("peak_kib", NOISE_FLOOR_KIB)):
+            if result[metric] > base[metric] * threshold and result[metric] - base[metric] > floor:
+                regressions.append(f"{name} {metric}: {base[metric]:.3f} -> {result[metric]:.3f}")
+    return regressions
+
+def print_report(results, baseline):
+    print(f"{'benchmark':42} {'p50 ms':>10} {'p99 ms':>10} {'peak KiB':>10} {'p50 vs base':>12}")
+    for name, r in results.items():
+        base = baseline.get(name)
+        delta = f"{r['p50_ms'] / base['p50_ms']:.2f}x" if base and base["p50_ms"] else "-"
+        print(f"{name:42} {r['p50_ms']:10.3f} {r['p99_ms']:10.3f} {r['peak_kib']:10.1f} {delta:>12}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the analytics, AI and render hot paths.")
+    parser.add_argument("--populations", nargs="+", choices=list(POPULATIONS), default=list(POPULATIONS))
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Write these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=1.5, help="Allowed slowdown ratio before failing")
+    args = parser.parse_args()
+
+    cold_import, budget_problems = cold_import_benchmark()
+    results = {"cold_import_landing": cold_import}
+    results.update(micro_benchmarks(args.iterations))
+    for name in args.populations:
+        results.update(population_benchmarks(name, POPULATIONS[name], args.iterations))
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+    regressions = budget_problems + compare(results, baseline, args.threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+import re
+
+from db import connection, register_schema
+
+# Token budget for the conversation part of each request (summary + recent
+# turns); the system prompt comes on top of this.
+CONTEXT_TOKEN_BUDGET = 1500
+SUMMARY_TOKEN_BUDGET = 300
+SUMMARY_LINE_CHARS = 160
+# Messages kept in st.session_state; older ones go to the archive table.
+MAX_CHAT_MESSAGES = 40
+KEEP_AFTER_COMPACTION = 20
+ARCHIVE_PAGE_SIZE = 20
+
+register_schema(
+    """
+    CREATE TABLE IF NOT EXISTS chat_archive (
+        username TEXT NOT NULL,
+        seq INTEGER NOT NULL,
+        role TEXT NOT NULL,
+        text TEXT NOT NULL,
+        PRIMARY KEY (username, seq)
+    ) WITHOUT ROWID;
+    """
+)
+
+def estimate_tokens(text):
+    # ~4 characters per token is close enough for English chat; no tokenizer needed.
+    return (len(text) + 3) // 4
+
+def message_tokens(msg):
+    return estimate_tokens(msg["text"]) + 4
+
+def _summary_line(msg):
+    text = re.sub(r"[*_#`>]", "", msg["text"]).strip()
+    first = re.split(r"(?<=[.!?])\s+", text, maxsplit=1)[0]
+    if len(first) > SUMMARY_LINE_CHARS:
+        first = first[: SUMMARY_LINE_CHARS - 1].rstrip() + "…"
+    return f"{'User' if msg['role'] == 'user' else 'Coach'}: {first}"
+
+def fold_summary(summary, messages):
+    # Append one line per folded message, then drop the oldest lines until the
+    # summary fits its budget.
+    lines = [line for line in summary.splitlines() if line]
+    lines += [_summary_line(msg) for msg in messages if msg["text"].strip()]
+    while len(lines) > 1 and estimate_tokens("\n".join(lines)) > SUMMARY_TOKEN_BUDGET:
+        lines.pop(0)
+    return "\n".join(lines)
+
+def build_context(chat_history, summary=""):
+    # The newest messages that fit the budget; older ones are folded into the summary.
+    used = estimate_tokens(summary)
+    recent = []
+    for msg in reversed(chat_history):
+        cost = message_tokens(msg)
+        if recent and used + cost > CONTEXT_TOKEN_BUDGET:
+            break
+        recent.append(msg)
+        used += cost
+    recent.reverse()
+    older = chat_history[: len(chat_history) - len(recent)]
+    if older:
+        summary = fold_summary(summary, older)
+    return summary, recent
+
+def archive_messages(username, messages):
+    with connection() as conn, conn:
+        # Take the write lock before reading MAX(seq), so two sessions of the
+        # same user compacting at once cannot both claim the same seq.
+        conn.execute("BEGIN IMMEDIATE")
+        start = conn.execute(
+            "SELECT COALESCE(MAX(seq), 0) FROM chat_archive WHERE username = ?", (username,)
+        ).fetchone()[0]
+        conn.executemany(
+            "INSERT INTO chat_archive (username, seq, role, text) VALUES (?, ?, ?, ?)",
+            ((username, start + i + 1, msg["role"], msg["text"]) for i, msg in enumerate(messages)),
+        )
+
+def archived_count(username):
+    with connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM chat_archive WHERE username = ?", (username,)).fetchone()[0]
+
+def load_archived(username, page=0, page_size=ARCHIVE_PAGE_SIZE):
+    # Page 0 is the most recent archived messages; returned oldest first.
+    with connection() as conn:
+        rows = conn.execute(
+            "SELECT role, text FROM chat_archive WHERE username = ? ORDER BY seq DESC LIMIT ? OFFSET ?",
+            (username, page_size, page * page_size),
+        ).fetchall()
+    return [dict(row) for row in reversed(rows)]
+
+def compact_history(username, chat_history, summary):
+    # Returns the (history, summary) to keep in the session.
+    if len(chat_history) <= MAX_CHAT_MESSAGES:
+        return chat_history, summary
+    overflow = chat_history[:-KEEP_AFTER_COMPACTION]
+    if username:
+        archive_messages(username, overflow)
+    return chat_history[-KEEP_AFTER_COMPACTION:], fold_summary(summary, overflow)
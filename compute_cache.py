@@ -0,0 +1,124 @@
+import functools
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+
+import metrics
+
+_MISSING = object()
+
+class LRUStore:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+_process_stores = {}
+_process_lock = threading.Lock()
+# Hits/misses per stage across every scope and session, for metrics export.
+_totals = {}
+
+def _freeze(value):
+    # Turn stage inputs into a hashable key. Containers are compared by content,
+    # frames and arrays by their bytes; anything else must already be hashable
+    # (plain objects such as a compiled scorer then key by identity).
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, set):
+        return frozenset(value)
+    if hasattr(value, "columns") and hasattr(value, "index"):
+        import pandas as pd
+        return ("frame", tuple(value.columns), pd.util.hash_pandas_object(value).to_numpy().tobytes())
+    if hasattr(value, "tobytes") and hasattr(value, "shape"):
+        return ("array", value.shape, str(value.dtype), value.tobytes())
+    return value
+
+def _store(scope, name, maxsize):
+    if scope == "session":
+        try:
+            stores = st.session_state.setdefault("_compute_cache", {})
+        except Exception:
+            # No Streamlit session (e.g. a script or benchmark): fall back to the process.
+            stores = None
+        if stores is not None:
+            if name not in stores:
+                stores[name] = LRUStore(maxsize)
+            return stores[name]
+    with _process_lock:
+        if name not in _process_stores:
+            _process_stores[name] = LRUStore(maxsize)
+        return _process_stores[name]
+
+def memoize(scope="process", maxsize=128):
+    # scope="process" shares results between all sessions; use "session" for
+    # per-user inputs so one user's entries cannot push out another's.
+    if scope not in ("process", "session"):
+        raise ValueError(f"Unknown cache scope: {scope}")
+
+    def decorator(fn):
+        name = f"{fn.__module__}.{fn.__qualname__}"
+        totals = _totals.setdefault(name, {"hits": 0, "misses": 0})
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = _freeze((args, kwargs))
+            store = _store(scope, name, maxsize)
+            value = store.get(key)
+            if value is _MISSING:
+                with _process_lock:
+                    totals["misses"] += 1
+                with metrics.timed(name):
+                    value = fn(*args, **kwargs)
+                store.set(key, value)
+            else:
+                with _process_lock:
+                    totals["hits"] += 1
+            return value
+
+        wrapper.cache_name = name
+        return wrapper
+
+    return decorator
+
+def total_stats():
+    with _process_lock:
+        return {name: dict(counts) for name, counts in _totals.items()}
+
+metrics.register_cache("compute", total_stats)
+
+def cache_stats():
+    # Hit/miss counts per stage: process-wide stores plus the current session's.
+    with _process_lock:
+        stats = {name: store.stats() for name, store in _process_stores.items()}
+    try:
+        session_stores = dict(st.session_state.get("_compute_cache", {}))
+    except Exception:
+        session_stores = {}
+    for name, store in session_stores.items():
+        stats[f"{name} (session)"] = store.stats()
+    return stats
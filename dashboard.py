@@ -0,0 +1,291 @@
+import os
+
+import streamlit as st
+import pandas as pd
+import altair as alt
+from datetime import date, time
+from analytics import calculate_hybrid_stability, generate_scroll_pattern, detect_doomscrolling
+from ai_service import stream_ai_response
+from chat_context import ARCHIVE_PAGE_SIZE, archived_count, compact_history, load_archived
+from compute_cache import memoize
+import metrics
+import user_store
+from downsample import downsample
+from history_store import append_day, get_recent_days
+from trend_stats import STREAK_THRESHOLD, get_recent_stats
+from user_models import get_user_scorer
+from styles import apply_dark_theme
+
+TREND_WINDOW_DAYS = 30
+# Who sees the process-wide metrics panel: a comma-separated allow-list, empty
+# by default. It is deliberately not the seeded demo account, whose password is public.
+ADMIN_USERS = {name.strip() for name in os.environ.get("RHYTHM_ADMIN_USERS", "").split(",") if name.strip()}
+# Max points per chart sent to the browser, however much data sits behind it.
+CHART_POINT_BUDGET = 500
+
+# Each rerun only recomputes the stages whose inputs changed.
+_hybrid_stability = memoize(maxsize=256)(calculate_hybrid_stability)
+_scroll_pattern = memoize(maxsize=64)(generate_scroll_pattern)
+
+@memoize(scope="session", maxsize=32)
+def _score_day(scorer, log_data):
+    return scorer.score_one(log_data)
+
+@memoize(maxsize=256)
+def _scroll_risk(intensity, erraticness, current_time_obj):
+    risk, _ = detect_doomscrolling(_scroll_pattern(intensity, erraticness), current_time_obj)
+    return risk
+
+@memoize(scope="session", maxsize=4)
+def _trend_chart(trend, stats):
+    data = pd.DataFrame(trend)
+    if stats:
+        data = data.merge(pd.DataFrame(stats)[["day", "ma7", "ma30"]], on="day", how="left")
+    base = alt.Chart(downsample(data, "stability_index", CHART_POINT_BUDGET, "lttb"))
+    chart = base.mark_area(
+        line={"color": "#00e5ff"},
+        color=alt.Gradient(
+            gradient="linear",
+            stops=[alt.GradientStop(color="#00e5ff", offset=0), alt.GradientStop(color="transparent", offset=1)],
+            x1=1, x2=1, y1=1, y2=0,
+        ),
+    ).encode(x="day", y="stability_index")
+    if stats:
+        averages = (
+            base.transform_fold(["ma7", "ma30"], as_=["average", "value"])
+            .mark_line(strokeDash=[4, 3])
+            .encode(
+                x="day",
+                y="value:Q",
+                color=alt.Color(
+                    "average:N",
+                    scale=alt.Scale(domain=["ma7", "ma30"], range=["#facc15", "#a78bfa"]),
+                    legend=alt.Legend(title=None, orient="bottom"),
+                ),
+            )
+        )
+        chart = chart + averages
+    return apply_dark_theme(chart.interactive())
+
+@memoize(maxsize=64)
+def _scroll_chart(intensity, erraticness, high_risk):
+    chart = (
+        alt.Chart(downsample(_scroll_pattern(intensity, erraticness), "Velocity (px/s)", CHART_POINT_BUDGET, "minmax"))
+        .mark_bar(color="#ef4444" if high_risk else "#3b82f6")
+        .encode(x=alt.X("Seconds", axis=alt.Axis(labels=False)), y="Velocity (px/s)")
+        .properties(height=250)
+    )
+    return apply_dark_theme(chart)
+
+def show_main_app():
+    current_user = st.session_state["username"]
+    user_data = user_store.get_profile(current_user) or {}
+
+    with st.container():
+        st.markdown('<div class="account-floater">', unsafe_allow_html=True)
+        if st.button("👤", key="btn_account_float", help="Account"):
+            st.session_state.show_account_window = not st.session_state.show_account_window
+        st.markdown("</div>", unsafe_allow_html=True)
+
+    with st.container():
+        st.markdown('<div class="chat-floater">', unsafe_allow_html=True)
+        if st.button("💬", key="btn_chat_float", help="Chat"):
+            st.session_state.show_chat_window = not st.session_state.show_chat_window
+            st.rerun()
+        st.markdown("</div>", unsafe_allow_html=True)
+
+    with st.sidebar:
+        if st.session_state.show_chat_window:
+            st.markdown("### 💬 AI Coach")
+            if st.button("🔙 Back to Controls", use_container_width=True):
+                st.session_state.show_chat_window = False
+                st.rerun()
+
+            messages_container = st.container()
+            with messages_container:
+                # Older messages live in the archive and are only read when asked for.
+                archived = archived_count(current_user)
+                if archived and st.toggle(f"Show earlier messages ({archived})", key="show_archived_chat"):
+                    pages = st.session_state.get("chat_archive_pages", 1)
+                    remaining = archived - pages * ARCHIVE_PAGE_SIZE
+                    if remaining > 0 and st.button(f"Load older messages ({remaining} more)", key="btn_older_chat"):
+                        st.session_state["chat_archive_pages"] = pages + 1
+                        st.rerun()
+                    for page in reversed(range(pages)):
+                        for msg in load_archived(current_user, page):
+                            with st.chat_message(msg["role"]):
+                                st.write(msg["text"])
+                for msg in st.session_state["chat_history"]:
+                    with st.chat_message(msg["role"]):
+                        st.write(msg["text"])
+
+            user_input = st.chat_input("Ask advice...")
+            if user_input:
+                st.session_state["chat_history"].append({"role": "user", "text": user_input})
+                with st.chat_message("user"):
+                    st.write(user_input)
+                metrics.increment("ai_messages")
+                with st.chat_message("assistant"):
+                    response = st.write_stream(
+                        stream_ai_response(
+                            user_input,
+                            st.session_state["chat_history"],
+                            st.session_state["chat_session_id"],
+                            st.session_state["chat_summary"],
+                        )
+                    )
+                st.session_state["chat_history"].append({"role": "assistant", "text": response})
+                st.session_state["chat_history"], st.session_state["chat_summary"] = compact_history(
+                    current_user, st.session_state["chat_history"], st.session_state["chat_summary"]
+                )
+                st.rerun()
+
+            steps = 7000
+            snooze_delta = 1
+            symptoms = []
+            lifestyle = ["Stress"]
+            sim_time = time(23, 30)
+            scroll_intensity, scroll_variance = 800, 20
+
+        else:
+            st.markdown("## 🎮 Controls")
+            with st.expander("👤 1. User Profile"):
+                st.markdown(f"**User:** {user_data.get('full_name', current_user)}")
+                st.caption("Edit details in Account 👤")
+
+            with st.expander("📝 2. Day Simulation", expanded=True):
+                alarm = st.slider("⏰ Alarm Time", 4, 12, 7)
+                unlock = st.slider("🔓 Actual Wake Up", 4, 14, 8)
+                snooze_delta = max(0, unlock - alarm)
+                steps = st.slider("👟 Daily Steps", 0, 15000, 7000)
+                st.markdown("---")
+                symptoms = st.multiselect("Symptoms Today", ["Headache", "Fatigue", "Anxiety", "Insomnia"], default=[])
+                lifestyle = st.multiselect("Risk Factors", ["High Stress", "Smoking"], default=["High Stress"])
+
+            with st.expander("📜 3. Thumb Physics", expanded=True):
+                sim_time = st.time_input("Current Time", value=time(23, 30))
+                scroll_intensity = st.slider("Scroll Speed (px/s)", 0, 2000, 800)
+                scroll_variance = st.slider("Erraticness", 0, 100, 20)
+
+            st.markdown("<br>", unsafe_allow_html=True)
+
+            if st.button("💾 Save Daily Stats", use_container_width=True):
+                with metrics.timed("save_day"):
+                    log_data = {"snooze_delta": snooze_delta, "daily_steps": steps, "app_switch_rate": 40, "pickup_count": 80}
+                    ai_score = _score_day(get_user_scorer(current_user), log_data)
+                    final_stability, _, _ = _hybrid_stability(ai_score, lifestyle, symptoms, 25)
+
+                    append_day(current_user, date.today().isoformat(), final_stability, log_data)
+                metrics.increment("days_saved")
+                st.toast("Saved!")
+
+            if st.button("⬅️ Log Out", use_container_width=True):
+                st.session_state["logged_in"] = False
+                st.session_state["page"] = "landing"
+                # The chat belongs to this user; app.py starts a fresh one for the next login.
+                for key in ("chat_history", "chat_summary", "chat_session_id", "chat_archive_pages", "show_archived_chat"):
+                    st.session_state.pop(key, None)
+                st.rerun()
+
+    if st.session_state.show_account_window:
+        with st.expander("👤 Account Profile", expanded=True):
+            e_name = st.text_input("Name", user_data.get("full_name", ""))
+            e_age = st.number_input("Age", 18, 100, int(user_data.get("age", 25)))
+            if st.button("Update Profile"):
+                user_store.update_profile(current_user, full_name=e_name, age=int(e_age))
+                st.success("Updated!")
+
+    st.markdown(f"## 🧠 Rhythm Anchor")
+    st.caption(f"Welcome back, {user_data.get('full_name', current_user)}")
+    tab1, tab2 = st.tabs(["📊 Dashboard", "🛑 Doomscroll"])
+
+    with tab1:
+        st.markdown("<br>", unsafe_allow_html=True)
+        log_data = {"snooze_delta": snooze_delta, "daily_steps": steps, "app_switch_rate": 40, "pickup_count": 80}
+        with metrics.timed("model_scoring"):
+            ai_score = _score_day(get_user_scorer(current_user), log_data)
+            final_stability, _, impact_reasons = _hybrid_stability(ai_score, lifestyle, symptoms, 25)
+
+        if final_stability < 50:
+            status_class, status_text, main_icon = "status-danger", "Risk Detected", "⚠️"
+        elif final_stability < 80:
+            status_class, status_text, main_icon = "status-warning", "Minor Deviation", "🛡️"
+        else:
+            status_class, status_text, main_icon = "status-safe", "Stable Rhythm", "✅"
+
+        c1, c2, c3 = st.columns(3)
+        with c1: st.markdown(f"""<div class="metric-card"><div class="metric-value">{main_icon} {final_stability}/100</div><div>Stability Index</div><div class="{status_class}">{status_text}</div></div>""", unsafe_allow_html=True)
+        with c2: st.markdown(f"""<div class="metric-card"><div class="metric-value">🛌 {snooze_delta}h</div><div>Snooze Delta</div></div>""", unsafe_allow_html=True)
+        with c3: st.markdown(f"""<div class="metric-card"><div class="metric-value">👟 {steps}</div><div>Steps Today</div></div>""", unsafe_allow_html=True)
+
+        st.markdown("---")
+
+        col_a, col_b = st.columns([1, 2])
+        with col_a:
+            st.subheader("📉 Risks")
+            if impact_reasons:
+                for r in impact_reasons: st.markdown(f"🔴 {r}")
+            else:
+                st.markdown("🟢 No significant risks")
+
+        with col_b:
+            st.subheader("📈 Trend")
+            with metrics.timed("history_read"):
+                trend = get_recent_days(current_user, TREND_WINDOW_DAYS)
+                stats = get_recent_stats(current_user, TREND_WINDOW_DAYS)
+            if trend:
+                with metrics.timed("trend_chart"):
+                    st.altair_chart(_trend_chart(trend, stats), use_container_width=True)
+                if stats:
+                    latest = stats[-1]
+                    st.caption(
+                        f"🔥 {latest['streak']}-day streak at {STREAK_THRESHOLD}+ · "
+                        f"7-day avg {latest['ma7']:.0f} · 30-day avg {latest['ma30']:.0f} · "
+                        f"volatility ±{latest['volatility']:.1f}"
+                    )
+            else:
+                st.info("Save daily stats to see trends!")
+
+    with tab2:
+        st.markdown("<br>", unsafe_allow_html=True)
+        with metrics.timed("doomscroll_detection"):
+            risk = _scroll_risk(scroll_intensity, scroll_variance, sim_time)
+
+        c_a, c_b = st.columns([2, 1])
+        with c_a:
+            with metrics.timed("scroll_chart"):
+                st.altair_chart(_scroll_chart(scroll_intensity, scroll_variance, risk > 50), use_container_width=True)
+        with c_b:
+            if risk > 60: st.markdown(f"""<div class="metric-card" style="border: 1px solid #ef4444;"><div style="font-size:40px;">🛑</div><h3 style="color:#ef4444;">High Risk</h3></div>""", unsafe_allow_html=True)
+            else: st.markdown(f"""<div class="metric-card" style="border: 1px solid #10b981;"><div style="font-size:40px;">✅</div><h3 style="color:#10b981;">Focused</h3></div>""", unsafe_allow_html=True)
+
+    if current_user in ADMIN_USERS:
+        show_metrics_panel()
+
+def show_metrics_panel():
+    with st.expander("📈 Performance Metrics (admin)"):
+        data = metrics.snapshot()
+        counters = data["counters"]
+        m1, m2, m3 = st.columns(3)
+        m1.metric("Reruns", counters.get("reruns", 0))
+        m2.metric("Days Saved", counters.get("days_saved", 0))
+        m3.metric("AI Messages", counters.get("ai_messages", 0))
+
+        st.markdown("**Stage timings**")
+        stages = [
+            {"stage": stage, "count": h["count"], "mean_ms": round(h["sum_ms"] / h["count"], 3) if h["count"] else 0.0}
+            for stage, h in sorted(data["histograms"].items())
+        ]
+        st.dataframe(pd.DataFrame(stages), use_container_width=True, hide_index=True)
+
+        st.markdown("**Cache hit rates**")
+        caches = [
+            {"cache": name, "hits": c["hits"], "misses": c["misses"], "hit_rate": round(c["hit_rate"], 3)}
+            for name, c in sorted(data["caches"].items())
+        ]
+        st.dataframe(pd.DataFrame(caches), use_container_width=True, hide_index=True)
+        st.caption(f"Session state: {len(st.session_state)} keys, {len(st.session_state['chat_history'])} chat messages")
+
+        d1, d2 = st.columns(2)
+        d1.download_button("Prometheus", metrics.prometheus_text(), file_name="rhythm_metrics.prom", use_container_width=True)
+        d2.download_button("JSONL", metrics.jsonl_line() + "\n", file_name="rhythm_metrics.jsonl", use_container_width=True)
@@ -0,0 +1,62 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+DB_PATH = os.environ.get("RHYTHM_DB_PATH", "rhythm_anchor.db")
+# Streamlit runs every rerun on a fresh thread, so connections are pooled
+# rather than kept per thread.
+POOL_SIZE = 8
+
+_schemas = []
+_pool = queue.LifoQueue()
+_created = 0
+_pool_lock = threading.Lock()
+
+class _Connection(sqlite3.Connection):
+    schemas_applied = 0
+
+def register_schema(ddl):
+    # Modules register their tables once at import; every connection applies them.
+    _schemas.append(ddl)
+
+def _connect():
+    directory = os.path.dirname(DB_PATH)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(DB_PATH, timeout=30, check_same_thread=False, factory=_Connection)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+def _checkout():
+    global _created
+    try:
+        return _pool.get_nowait()
+    except queue.Empty:
+        pass
+    with _pool_lock:
+        if _created < POOL_SIZE:
+            # Count the slot only once the connection exists; a failed connect
+            # must not use up the pool and leave later callers waiting forever.
+            conn = _connect()
+            _created += 1
+            return conn
+    return _pool.get()
+
+@contextmanager
+def connection():
+    conn = _checkout()
+    try:
+        if conn.schemas_applied < len(_schemas):
+            with conn:
+                for ddl in _schemas[conn.schemas_applied:]:
+                    conn.executescript(ddl)
+            conn.schemas_applied = len(_schemas)
+        yield conn
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        _pool.put(conn)
@@ -0,0 +1,97 @@
+import numpy as np
+
+def _average_path_length(n_samples):
+    # Same expression as sklearn's IsolationForest so scores match bit for bit.
+    n_samples = np.asarray(n_samples, dtype=float)
+    result = np.zeros(n_samples.shape)
+    result[n_samples == 2] = 1.0
+    mask = n_samples > 2
+    result[mask] = (
+        2.0 * (np.log(n_samples[mask] - 1.0) + np.euler_gamma)
+        - 2.0 * (n_samples[mask] - 1.0) / n_samples[mask]
+    )
+    return result
+
+class CompiledForest:
+    # A fitted IsolationForest flattened into contiguous node arrays. Leaves
+    # point back at themselves, so every row walks max_depth steps with no
+    # branching and all trees advance together in one NumPy operation.
+
+    def __init__(self, forest):
+        self.model = forest
+        self.feature_names = list(getattr(forest, "feature_names_in_", []))
+        self.n_features = forest.n_features_in_
+        subsample = forest._max_features != forest.n_features_in_
+
+        features, thresholds, lefts, rights, path_lengths, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for tree, tree_features in zip(forest.estimators_, forest.estimators_features_):
+            t = tree.tree_
+            n = t.node_count
+            ids = np.arange(n)
+            is_leaf = t.children_left == -1
+
+            feature = np.where(is_leaf, 0, t.feature)
+            if subsample:
+                feature = np.asarray(tree_features)[feature]
+
+            # Nodes on the root-to-node path, root counting as 1.
+            path_nodes = np.ones(n, dtype=np.int64)
+            for node in range(n):
+                if not is_leaf[node]:
+                    path_nodes[t.children_left[node]] = path_nodes[node] + 1
+                    path_nodes[t.children_right[node]] = path_nodes[node] + 1
+
+            features.append(feature)
+            thresholds.append(t.threshold)
+            lefts.append(np.where(is_leaf, ids, t.children_left) + offset)
+            rights.append(np.where(is_leaf, ids, t.children_right) + offset)
+            path_lengths.append(path_nodes + _average_path_length(t.n_node_samples) - 1.0)
+            roots.append(offset)
+            offset += n
+            max_depth = max(max_depth, t.max_depth)
+
+        self.feature = np.ascontiguousarray(np.concatenate(features), dtype=np.intp)
+        self.threshold = np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64)
+        self.left = np.ascontiguousarray(np.concatenate(lefts), dtype=np.intp)
+        self.right = np.ascontiguousarray(np.concatenate(rights), dtype=np.intp)
+        self.path_length = np.ascontiguousarray(np.concatenate(path_lengths), dtype=np.float64)
+        self.roots = np.asarray(roots, dtype=np.intp)
+        self.max_depth = max_depth
+        self.denominator = len(forest.estimators_) * _average_path_length([forest.max_samples_])[0]
+        self.offset = forest.offset_
+
+    def _as_matrix(self, X):
+        if isinstance(X, dict):
+            X = [X]
+        if hasattr(X, "columns") and self.feature_names:
+            X = X[self.feature_names].to_numpy()
+        elif isinstance(X, list) and X and isinstance(X[0], dict):
+            X = [[row[name] for name in self.feature_names] for row in X]
+        # Trees compare float32 inputs against float64 thresholds, as sklearn does.
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {X.shape[1]}")
+        return X
+
+    def score_samples(self, X):
+        X = self._as_matrix(X)
+        rows = np.arange(X.shape[0])[:, None]
+        nodes = np.tile(self.roots, (X.shape[0], 1))
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        # cumsum adds trees left to right, the same order sklearn accumulates in.
+        depths = np.cumsum(self.path_length[nodes], axis=1)[:, -1]
+        if self.denominator == 0:
+            return -np.full(X.shape[0], 0.5)
+        return -(2 ** (-depths / self.denominator))
+
+    def decision_function(self, X):
+        return self.score_samples(X) - self.offset
+
+    def score_one(self, row):
+        return float(self.decision_function(row)[0])
@@ -0,0 +1,74 @@
+from analytics import FEATURE_COLUMNS
+from db import connection, register_schema
+import trend_stats
+
+# The (username, day) primary key is a clustered index: appends are a single
+# B-tree insert and per-user range scans never touch other users' rows.
+register_schema(
+    """
+    CREATE TABLE IF NOT EXISTS history (
+        username TEXT NOT NULL,
+        day TEXT NOT NULL,
+        stability_index INTEGER NOT NULL,
+        snooze_delta REAL,
+        daily_steps REAL,
+        app_switch_rate REAL,
+        pickup_count REAL,
+        PRIMARY KEY (username, day)
+    ) WITHOUT ROWID;
+    """
+)
+
+_COLUMNS = ["day", "stability_index"] + FEATURE_COLUMNS
+_INSERT = (
+    "INSERT OR REPLACE INTO history (username, day, stability_index, "
+    + ", ".join(FEATURE_COLUMNS)
+    + ") VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+
+def _row(username, day, stability_index, features):
+    return (username, str(day), int(stability_index)) + tuple(
+        float(features[name]) for name in FEATURE_COLUMNS
+    )
+
+def append_day(username, day, stability_index, features):
+    # day is an ISO date; saving the same day again replaces it.
+    row = _row(username, day, stability_index, features)
+    with connection() as conn, conn:
+        conn.execute(_INSERT, row)
+        trend_stats.record(conn, username, [row[1:3]])
+
+def append_days(username, rows):
+    # rows: iterable of (day, stability_index, features) written in one transaction.
+    rows = [_row(username, *row) for row in rows]
+    with connection() as conn, conn:
+        conn.executemany(_INSERT, rows)
+        trend_stats.record(conn, username, (row[1:3] for row in rows))
+
+def get_range(username, start=None, end=None):
+    query = f"SELECT {', '.join(_COLUMNS)} FROM history WHERE username = ?"
+    params = [username]
+    if start is not None:
+        query += " AND day >= ?"
+        params.append(str(start))
+    if end is not None:
+        query += " AND day <= ?"
+        params.append(str(end))
+    with connection() as conn:
+        rows = conn.execute(query + " ORDER BY day", params).fetchall()
+    return [dict(row) for row in rows]
+
+def get_recent_days(username, limit):
+    # Newest `limit` days, returned oldest first.
+    with connection() as conn:
+        rows = conn.execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM history WHERE username = ? ORDER BY day DESC LIMIT ?",
+            (username, limit),
+        ).fetchall()
+    return [dict(row) for row in reversed(rows)]
+
+def count_days(username):
+    with connection() as conn:
+        return conn.execute(
+            "SELECT COUNT(*) FROM history WHERE username = ?", (username,)
+        ).fetchone()[0]
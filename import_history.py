@@ -0,0 +1,128 @@
+import argparse
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from analytics import FEATURE_COLUMNS, LIFESTYLE_PENALTIES, SYMPTOM_WEIGHTS, calculate_hybrid_stability_batch, get_model
+from history_store import append_days
+
+DEFAULT_CHUNK_SIZE = 10000
+# Export column names we recognise for each field, checked in order.
+COLUMN_ALIASES = {
+    "username": ["username", "user", "user_id"],
+    "day": ["day", "date", "timestamp"],
+    "snooze_delta": ["snooze_delta", "snooze", "snooze_hours"],
+    "daily_steps": ["daily_steps", "steps", "step_count"],
+    "app_switch_rate": ["app_switch_rate", "app_switches", "switches_per_hour"],
+    "pickup_count": ["pickup_count", "pickups", "unlocks"],
+}
+# Same defaults the sidebar uses when a feature is not tracked.
+FEATURE_DEFAULTS = {"app_switch_rate": 40, "pickup_count": 80}
+
+def read_chunks(path, chunk_size):
+    if path.endswith((".jsonl", ".ndjson", ".json")):
+        return pd.read_json(path, lines=True, chunksize=chunk_size)
+    return pd.read_csv(path, chunksize=chunk_size)
+
+def map_columns(chunk, overrides=None, username=None):
+    overrides = overrides or {}
+    lower = {str(col).strip().lower(): col for col in chunk.columns}
+    mapped = pd.DataFrame(index=chunk.index)
+    for field, aliases in COLUMN_ALIASES.items():
+        source = overrides.get(field) or next((lower[a] for a in aliases if a in lower), None)
+        if source is not None:
+            mapped[field] = chunk[source]
+        elif field == "username" and username:
+            mapped[field] = username
+        elif field in FEATURE_DEFAULTS:
+            mapped[field] = FEATURE_DEFAULTS[field]
+        else:
+            raise ValueError(f"No column found for {field!r}; pass --map {field}=<column>")
+    if username:
+        mapped["username"] = username
+    # Lifestyle, symptom, age and other-symptom count columns pass straight through to batch scoring.
+    for name in [*LIFESTYLE_PENALTIES, *SYMPTOM_WEIGHTS, "age", "other_symptoms"]:
+        if name in chunk:
+            if name in ("age", "other_symptoms"):
+                mapped[name] = pd.to_numeric(chunk[name], errors="coerce").fillna(0)
+            else:
+                mapped[name] = chunk[name].fillna(False).astype(bool)
+    # Malformed dates and numbers become NaN and the row is skipped, rather than
+    # failing the import after earlier chunks are already written.
+    mapped["day"] = pd.to_datetime(mapped["day"], errors="coerce").dt.strftime("%Y-%m-%d")
+    for name in FEATURE_COLUMNS:
+        mapped[name] = pd.to_numeric(mapped[name], errors="coerce").astype(float)
+    return mapped.dropna(subset=["username", "day", *FEATURE_COLUMNS])
+
+def score_chunk(mapped):
+    stability, _, _ = calculate_hybrid_stability_batch(mapped)
+    return mapped[["username", "day", *FEATURE_COLUMNS]].assign(stability_index=stability)
+
+def write_scored(scored):
+    for username, rows in scored.groupby("username", sort=False):
+        append_days(
+            str(username),
+            (
+                (row.day, row.stability_index, {name: getattr(row, name) for name in FEATURE_COLUMNS})
+                for row in rows.itertuples(index=False)
+            ),
+        )
+    return len(scored)
+
+def import_files(paths, chunk_size=DEFAULT_CHUNK_SIZE, workers=None, overrides=None, username=None):
+    # Returns (days written, malformed rows skipped). At most 2 * workers chunks
+    # are read ahead of the writer, so memory stays bounded by chunk_size no
+    # matter how large the files are. Chunks are written in file order: an
+    # earlier day landing after a later one would make trend_stats rebuild
+    # that user's whole history.
+    workers = workers or os.cpu_count() or 1
+    # Make sure a model is published before workers start, so they do not all
+    # train one on an empty model dir.
+    get_model()
+    written = skipped = 0
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for path in paths:
+            for chunk in read_chunks(path, chunk_size):
+                mapped = map_columns(chunk, overrides, username)
+                skipped += len(chunk) - len(mapped)
+                pending.append(pool.submit(score_chunk, mapped))
+                if len(pending) >= 2 * workers:
+                    written += write_scored(pending.popleft().result())
+        while pending:
+            written += write_scored(pending.popleft().result())
+    return written, skipped
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-import and score historical daily stats (CSV or JSONL).")
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--user", help="Assign every row to this user instead of a username column")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--map",
+        action="append",
+        default=[],
+        metavar="FIELD=COLUMN",
+        help=f"Source column for a field ({', '.join(COLUMN_ALIASES)})",
+    )
+    args = parser.parse_args()
+
+    overrides = {}
+    for item in args.map:
+        field, _, column = item.partition("=")
+        if field not in COLUMN_ALIASES or not column:
+            parser.error(f"Invalid --map {item!r}")
+        overrides[field] = column
+
+    written, skipped = import_files(args.paths, args.chunk_size, args.workers, overrides, args.user)
+    print(f"Imported {written} days")
+    if skipped:
+        print(f"Skipped {skipped} rows with a missing or malformed date or value")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,27 @@
+import json
+import os
+import subprocess
+import sys
+
+# What the landing/login pages may cost to import on a cold start, on top of
+# streamlit itself, and the modules they must not pull in.
+IMPORT_BUDGET_MS = 100
+HEAVY_MODULES = ["numpy", "pandas", "sklearn", "altair", "google.generativeai"]
+_PROBE = """
+import json, sys, time
+import streamlit
+before = set(sys.modules)
+start = time.perf_counter()
+import metrics, styles, views
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({"ms": elapsed, "heavy": [m for m in %r if m in sys.modules and m not in before]}))
+"""
+
+def probe_cold_import():
+    # Imports the landing page modules in a fresh interpreter, so nothing is
+    # already loaded. Returns {"ms": import time, "heavy": heavy modules pulled in}.
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE % HEAVY_MODULES],
+        cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
@@ -0,0 +1,137 @@
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+# Fraction of stage timings recorded; counters are always exact.
+SAMPLE_RATE = float(os.environ.get("RHYTHM_METRICS_SAMPLE_RATE", "1.0"))
+# When set, a JSON snapshot is appended here at most every EXPORT_INTERVAL_SECONDS.
+EXPORT_PATH = os.environ.get("RHYTHM_METRICS_JSONL")
+EXPORT_INTERVAL_SECONDS = 60
+BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_lock = threading.Lock()
+_counters = {}
+_gauges = {}
+_histograms = {}
+_caches = {}
+_last_export = 0.0
+
+def increment(name, amount=1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+def set_gauge(name, value):
+    with _lock:
+        _gauges[name] = value
+
+def set_max(name, value):
+    # High-water mark: for per-session values reported into one process-wide
+    # gauge, where the last writer would otherwise win.
+    with _lock:
+        _gauges[name] = max(_gauges.get(name, value), value)
+
+def observe(stage, elapsed_ms):
+    with _lock:
+        hist = _histograms.get(stage)
+        if hist is None:
+            hist = _histograms[stage] = {"buckets": [0] * len(BUCKETS_MS), "count": 0, "sum_ms": 0.0}
+        for i, bound in enumerate(BUCKETS_MS):
+            if elapsed_ms <= bound:
+                hist["buckets"][i] += 1
+                break
+        hist["count"] += 1
+        hist["sum_ms"] += elapsed_ms
+
+def sampled():
+    return SAMPLE_RATE >= 1 or random.random() < SAMPLE_RATE
+
+@contextmanager
+def timed(stage):
+    if not sampled():
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, (time.perf_counter() - start) * 1000)
+
+def register_cache(name, stats_fn):
+    # stats_fn returns {"hits": .., "misses": ..} or {sub_name: {"hits": .., "misses": ..}}.
+    with _lock:
+        _caches[name] = stats_fn
+
+def _cache_stats():
+    with _lock:
+        sources = dict(_caches)
+    stats = {}
+    for name, stats_fn in sources.items():
+        result = stats_fn()
+        if "hits" in result:
+            stats[name] = result
+        else:
+            for sub_name, sub_stats in result.items():
+                stats[f"{name}:{sub_name}"] = sub_stats
+    for entry in stats.values():
+        lookups = entry["hits"] + entry["misses"]
+        entry["hit_rate"] = entry["hits"] / lookups if lookups else 0.0
+    return stats
+
+def snapshot():
+    with _lock:
+        data = {
+            "timestamp": time.time(),
+            "counters": dict(_counters),
+            "gauges": dict(_gauges),
+            "histograms": {
+                stage: {"buckets": list(h["buckets"]), "count": h["count"], "sum_ms": h["sum_ms"]}
+                for stage, h in _histograms.items()
+            },
+        }
+    data["caches"] = _cache_stats()
+    return data
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+def prometheus_text():
+    data = snapshot()
+    lines = []
+    for name, value in sorted(data["counters"].items()):
+        lines.append(f"# TYPE rhythm_{name}_total counter")
+        lines.append(f"rhythm_{name}_total {value}")
+    for name, value in sorted(data["gauges"].items()):
+        lines.append(f"# TYPE rhythm_{name} gauge")
+        lines.append(f"rhythm_{name} {value}")
+    lines.append("# TYPE rhythm_stage_duration_ms histogram")
+    for stage, hist in sorted(data["histograms"].items()):
+        cumulative = 0
+        for bound, count in zip(BUCKETS_MS, hist["buckets"]):
+            cumulative += count
+            lines.append(f'rhythm_stage_duration_ms_bucket{{stage="{_label(stage)}",le="{bound}"}} {cumulative}')
+        lines.append(f'rhythm_stage_duration_ms_bucket{{stage="{_label(stage)}",le="+Inf"}} {hist["count"]}')
+        lines.append(f'rhythm_stage_duration_ms_sum{{stage="{_label(stage)}"}} {hist["sum_ms"]}')
+        lines.append(f'rhythm_stage_duration_ms_count{{stage="{_label(stage)}"}} {hist["count"]}')
+    for metric in ("hits", "misses"):
+        lines.append(f"# TYPE rhythm_cache_{metric}_total counter")
+        for cache, stats in sorted(data["caches"].items()):
+            lines.append(f'rhythm_cache_{metric}_total{{cache="{_label(cache)}"}} {stats[metric]}')
+    return "\n".join(lines) + "\n"
+
+def jsonl_line():
+    return json.dumps(snapshot(), sort_keys=True)
+
+def maybe_export():
+    global _last_export
+    if not EXPORT_PATH:
+        return
+    now = time.monotonic()
+    with _lock:
+        if now - _last_export < EXPORT_INTERVAL_SECONDS:
+            return
+        _last_export = now
+    with open(EXPORT_PATH, "a") as f:
+        f.write(jsonl_line() + "\n")
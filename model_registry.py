@@ -0,0 +1,125 @@
+import argparse
+import os
+import pickle
+import threading
+import time
+
+from analytics import generate_baseline, train_isolation_forest
+
+MODEL_DIR = os.environ.get("RHYTHM_MODEL_DIR", "models")
+MODEL_NAME = "isolation_forest"
+DEFAULT_PARAMS = {"days": 30, "seed": 42}
+# How often get_entry() looks at the CURRENT pointer for a hot swap.
+RELOAD_CHECK_SECONDS = 5
+
+_lock = threading.Lock()
+_active = None
+_last_check = 0.0
+
+def _model_path(version):
+    return os.path.join(MODEL_DIR, f"{MODEL_NAME}-v{version}.pkl")
+
+def _pointer_path():
+    return os.path.join(MODEL_DIR, "CURRENT")
+
+def list_versions():
+    if not os.path.isdir(MODEL_DIR):
+        return []
+    prefix, suffix = f"{MODEL_NAME}-v", ".pkl"
+    versions = []
+    for name in os.listdir(MODEL_DIR):
+        if name.startswith(prefix) and name.endswith(suffix):
+            try:
+                versions.append(int(name[len(prefix):-len(suffix)]))
+            except ValueError:
+                continue
+    return sorted(versions)
+
+def current_version():
+    try:
+        with open(_pointer_path()) as f:
+            return int(f.read().strip())
+    except (FileNotFoundError, ValueError):
+        return None
+
+def publish(model, params, activate_now=True):
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    entry = {"params": dict(params), "created_at": time.time(), "model": model}
+    version = max(list_versions(), default=0) + 1
+    while True:
+        try:
+            # O_EXCL claims the version number even if another process publishes too.
+            fd = os.open(_model_path(version), os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+            break
+        except FileExistsError:
+            version += 1
+    entry["version"] = version
+    with os.fdopen(fd, "wb") as f:
+        pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+    if activate_now:
+        activate(version)
+    return version
+
+def train_and_publish(days=DEFAULT_PARAMS["days"], seed=DEFAULT_PARAMS["seed"], activate_now=True):
+    model = train_isolation_forest(generate_baseline(days, seed))
+    return publish(model, {"days": days, "seed": seed}, activate_now)
+
+def activate(version):
+    global _last_check
+    if not os.path.exists(_model_path(version)):
+        raise ValueError(f"Model version {version} does not exist in {MODEL_DIR}")
+    tmp = _pointer_path() + f".{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(str(version))
+    os.replace(tmp, _pointer_path())
+    _last_check = 0.0
+
+def _load(version):
+    with open(_model_path(version), "rb") as f:
+        return pickle.load(f)
+
+def get_entry():
+    global _active, _last_check
+    now = time.monotonic()
+    if _active is not None and now - _last_check < RELOAD_CHECK_SECONDS:
+        return _active
+    with _lock:
+        if _active is not None and now - _last_check < RELOAD_CHECK_SECONDS:
+            return _active
+        version = current_version()
+        if version is None:
+            # First run on an empty model dir; later starts only unpickle.
+            version = train_and_publish()
+        if _active is None or _active["version"] != version:
+            _active = _load(version)
+        _last_check = time.monotonic()
+    return _active
+
+def get_model():
+    return get_entry()["model"]
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the shared IsolationForest models.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    train = sub.add_parser("train", help="Fit a baseline model and publish it as a new version")
+    train.add_argument("--days", type=int, default=DEFAULT_PARAMS["days"])
+    train.add_argument("--seed", type=int, default=DEFAULT_PARAMS["seed"])
+    train.add_argument("--no-activate", action="store_true")
+    act = sub.add_parser("activate", help="Point running apps at an existing version")
+    act.add_argument("version", type=int)
+    sub.add_parser("list", help="List published versions")
+    args = parser.parse_args()
+
+    if args.command == "train":
+        version = train_and_publish(args.days, args.seed, not args.no_activate)
+        print(f"Published {MODEL_NAME} v{version}")
+    elif args.command == "activate":
+        activate(args.version)
+        print(f"Activated {MODEL_NAME} v{args.version}")
+    else:
+        active = current_version()
+        for version in list_versions():
+            print(f"v{version}{' (active)' if version == active else ''}")
+
+if __name__ == "__main__":
+    main()
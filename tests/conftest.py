@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+# Point every store at a scratch directory before any app module reads its
+# path at import time.
+_scratch = tempfile.mkdtemp(prefix="rhythm_tests_")
+os.environ.setdefault("RHYTHM_DB_PATH", os.path.join(_scratch, "rhythm_anchor.db"))
+os.environ.setdefault("RHYTHM_MODEL_DIR", os.path.join(_scratch, "models"))
+os.environ.setdefault("RHYTHM_AI_CACHE", "memory")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
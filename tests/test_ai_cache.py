@@ -0,0 +1,83 @@
+import pytest
+
+import ai_cache
+import ai_service
+from ai_cache import MemoryCache, SQLiteCache, make_key
+from ai_stub import StubModel
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        # Every reading moves on a little, so LRU order never ties.
+        self.now += 0.001
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(ai_cache.time, "time", fake)
+    return fake
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make(request, tmp_path):
+    def factory(**kwargs):
+        if request.param == "memory":
+            return MemoryCache(**kwargs)
+        return SQLiteCache(path=str(tmp_path / "ai_cache.db"), **kwargs)
+    return factory
+
+def test_hits_and_misses_are_counted(make, clock):
+    cache = make()
+    assert cache.get("a") is None
+    cache.set("a", "reply")
+    assert cache.get("a") == "reply"
+    assert cache.get("a") == "reply"
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (2, 1, 1)
+    assert stats["hit_rate"] == pytest.approx(2 / 3)
+
+def test_entries_expire_after_ttl(make, clock):
+    cache = make(ttl_seconds=60)
+    cache.set("a", "reply")
+    clock.now += 59
+    assert cache.get("a") == "reply"
+    clock.now += 2
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+def test_least_recently_used_entry_is_evicted(make, clock):
+    cache = make(max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"
+    cache.set("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+    assert len(cache) == 2
+
+def test_key_ignores_case_whitespace_and_trailing_prompt():
+    history = [{"role": "assistant", "text": "Hi!"}]
+    asked = history + [{"role": "user", "text": "How do I sleep better?"}]
+    assert make_key("How do I sleep better?", asked) == make_key("  how do i   sleep better ", history)
+
+@pytest.fixture
+def stub(monkeypatch):
+    model = StubModel()
+    monkeypatch.setattr(ai_service, "response_cache", MemoryCache())
+    ai_service.set_ai_model(model)
+    yield model
+    ai_service.set_ai_model(None)
+
+def test_repeated_question_is_served_from_cache(stub):
+    history = [{"role": "assistant", "text": "Hi!"}, {"role": "user", "text": "Any tips for stress?"}]
+    first = ai_service.get_ai_response("Any tips for stress?", history, "alice")
+    second = ai_service.get_ai_response("any tips for stress", history[:1], "alice")
+
+    assert second == first
+    assert stub.calls == 1
+    assert ai_service.response_cache.stats()["hits"] == 1
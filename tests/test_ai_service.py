@@ -0,0 +1,38 @@
+import pytest
+
+import ai_service
+from ai_cache import MemoryCache
+from ai_stub import StubModel
+
+@pytest.fixture
+def stub(monkeypatch):
+    model = StubModel()
+    monkeypatch.setattr(ai_service, "response_cache", MemoryCache())
+    ai_service.set_ai_model(model)
+    yield model
+    ai_service.set_ai_model(None)
+
+def _ask(history, text, session_id):
+    history.append({"role": "user", "text": text})
+    reply = ai_service.get_ai_response(text, history, session_id)
+    history.append({"role": "assistant", "text": reply})
+
+def _chat_texts(session_id):
+    return [part for msg in ai_service._sessions[session_id]["chat"].history for part in msg["parts"]]
+
+def test_tabs_of_one_user_keep_separate_chats(stub):
+    tab_a = [{"role": "assistant", "text": "Hi!"}]
+    tab_b = [{"role": "assistant", "text": "Hi!"}]
+    _ask(tab_a, "I drink coffee at night", "tab-a")
+    _ask(tab_b, "I run every morning", "tab-b")
+    _ask(tab_a, "what next", "tab-a")
+
+    assert "I run every morning" not in _chat_texts("tab-a")
+    assert "I drink coffee at night" in _chat_texts("tab-a")
+
+def test_chat_is_reused_between_turns(stub):
+    history = [{"role": "assistant", "text": "Hi!"}]
+    for text in ["one", "two", "three"]:
+        _ask(history, text, "tab")
+
+    assert stub.chats_started == 1
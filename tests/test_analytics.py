@@ -0,0 +1,86 @@
+from datetime import time
+
+import numpy as np
+import pandas as pd
+
+from analytics import (
+    DoomscrollMonitor,
+    LIFESTYLE_PENALTIES,
+    OTHER_SYMPTOMS_REASON,
+    SYMPTOM_WEIGHTS,
+    calculate_hybrid_stability,
+    calculate_hybrid_stability_batch,
+    decode_reason_codes,
+    detect_doomscrolling,
+    generate_scroll_batch,
+)
+
+def test_batch_matches_scalar_scoring():
+    rng = np.random.default_rng(0)
+    n = 2000
+    ai_scores = rng.uniform(-0.6, 0.6, n)
+    ages = rng.integers(18, 90, n)
+    lifestyle = rng.random((n, len(LIFESTYLE_PENALTIES))) < 0.3
+    symptoms = rng.random((n, len(SYMPTOM_WEIGHTS))) < 0.2
+    other = rng.integers(0, 3, n)
+
+    data = pd.DataFrame(lifestyle, columns=list(LIFESTYLE_PENALTIES))
+    data[list(SYMPTOM_WEIGHTS)] = symptoms
+    data["age"] = ages
+    data["other_symptoms"] = other
+    stability, base, codes = calculate_hybrid_stability_batch(data, ai_scores)
+
+    for i in range(n):
+        factors = [f for f, on in zip(LIFESTYLE_PENALTIES, lifestyle[i]) if on]
+        # Known symptoms in SYMPTOM_WEIGHTS order, then unlisted ones.
+        syms = [s for s, on in zip(SYMPTOM_WEIGHTS, symptoms[i]) if on] + ["Nausea"] * other[i]
+        expected, expected_base, reasons = calculate_hybrid_stability(ai_scores[i], factors, syms, ages[i])
+
+        assert (stability[i], base[i]) == (expected, expected_base)
+        decoded = decode_reason_codes(codes[i])
+        known = [r for r in reasons if r != "Symptom (Nausea)"]
+        assert decoded == known + ([OTHER_SYMPTOMS_REASON] if other[i] else [])
+
+def test_scroll_batch_uses_each_sessions_branch():
+    intensity = np.array([100, 800, 250, 1200])
+    velocities = generate_scroll_batch(4, intensity, 20, duration_seconds=300, seed=1)
+
+    assert velocities.shape == (4, 300)
+    calm = velocities[[0, 2]]
+    assert np.all((calm == 0) | ((calm >= 50) & (calm < 400)))
+    assert np.all(calm == np.round(calm))
+    for row, level in [(1, 800), (3, 1200)]:
+        assert abs(velocities[row].mean() - level) < 30
+    np.testing.assert_array_equal(velocities, generate_scroll_batch(4, intensity, 20, duration_seconds=300, seed=1))
+
+def test_doomscroll_monitor_matches_batch_detection():
+    velocities = np.concatenate(
+        [
+            generate_scroll_batch(1, 150, 20, duration_seconds=90, seed=2)[0],
+            generate_scroll_batch(1, 900, 50, duration_seconds=90, seed=3)[0],
+            generate_scroll_batch(1, 150, 20, duration_seconds=90, seed=4)[0],
+        ]
+    )
+    late = time(23, 30)
+    monitor = DoomscrollMonitor(window_samples=60)
+    events = []
+    for i, v in enumerate(velocities):
+        event = monitor.update(v, late)
+        if event:
+            events.append(event)
+        if i >= 59:
+            window = pd.DataFrame({"Velocity (px/s)": velocities[i - 59 : i + 1]})
+            assert (monitor.risk, monitor.reasons) == detect_doomscrolling(window, late)
+
+    assert events and events[0]["sample"] >= 59
+    assert all(e["risk"] != e["previous_risk"] for e in events)
+
+def test_doomscroll_monitor_is_silent_while_warming_up():
+    # An idle first sample used to look like zero dwell time and raise an alert.
+    monitor = DoomscrollMonitor(window_samples=60)
+    assert monitor.update(0, time(23, 0)) is None
+    assert monitor.extend([900] * 58, time(23, 0)) == []
+    assert monitor.risk == 0
+
+    event = monitor.update(900, time(23, 0))
+    assert event["sample"] == 59 and event["risk"] == 100
@@ -0,0 +1,57 @@
+import threading
+import uuid
+
+from chat_context import (
+    CONTEXT_TOKEN_BUDGET,
+    KEEP_AFTER_COMPACTION,
+    MAX_CHAT_MESSAGES,
+    archive_messages,
+    archived_count,
+    build_context,
+    compact_history,
+    load_archived,
+    message_tokens,
+)
+
+def _messages(n, words=5):
+    return [{"role": "user" if i % 2 else "assistant", "text": f"message {i} " + "word " * words} for i in range(n)]
+
+def test_context_fits_budget_and_folds_the_rest():
+    history = _messages(200, words=40)
+    summary, recent = build_context(history)
+
+    assert sum(message_tokens(m) for m in recent) <= CONTEXT_TOKEN_BUDGET
+    assert recent == history[-len(recent):]
+    assert summary.splitlines()[-1].startswith(("User: message", "Coach: message"))
+
+def test_compaction_pages_old_messages_to_the_archive():
+    user = f"user-{uuid.uuid4().hex}"
+    history = _messages(MAX_CHAT_MESSAGES + 1)
+    kept, summary = compact_history(user, history, "")
+
+    assert kept == history[-KEEP_AFTER_COMPACTION:]
+    assert summary
+    assert archived_count(user) == len(history) - KEEP_AFTER_COMPACTION
+    assert load_archived(user, page=0, page_size=3) == [
+        {"role": m["role"], "text": m["text"]} for m in history[-KEEP_AFTER_COMPACTION - 3 : -KEEP_AFTER_COMPACTION]
+    ]
+
+def test_concurrent_archiving_never_reuses_a_seq():
+    user = f"user-{uuid.uuid4().hex}"
+    errors = []
+
+    def archive():
+        try:
+            for _ in range(20):
+                archive_messages(user, _messages(3))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=archive) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert archived_count(user) == 4 * 20 * 3
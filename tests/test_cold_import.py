@@ -0,0 +1,10 @@
+import statistics
+
+from import_probe import IMPORT_BUDGET_MS, probe_cold_import
+
+def test_landing_page_imports_stay_light():
+    probes = [probe_cold_import() for _ in range(3)]
+
+    assert [p["heavy"] for p in probes] == [[], [], []]
+    # Median of three fresh interpreters, so one slow start does not fail the run.
+    assert statistics.median(p["ms"] for p in probes) < IMPORT_BUDGET_MS
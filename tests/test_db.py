@@ -0,0 +1,25 @@
+import queue
+import sqlite3
+
+import pytest
+
+import db
+
+def test_failed_connects_do_not_use_up_the_pool(monkeypatch):
+    monkeypatch.setattr(db, "_pool", queue.LifoQueue())
+    monkeypatch.setattr(db, "_created", 0)
+    real_connect = db._connect
+
+    def broken_connect():
+        raise sqlite3.OperationalError("unable to open database file")
+
+    monkeypatch.setattr(db, "_connect", broken_connect)
+    for _ in range(db.POOL_SIZE + 1):
+        with pytest.raises(sqlite3.OperationalError):
+            with db.connection():
+                pass
+
+    monkeypatch.setattr(db, "_connect", real_connect)
+    with db.connection() as conn:
+        assert conn.execute("SELECT 1").fetchone()[0] == 1
+    assert db._created == 1
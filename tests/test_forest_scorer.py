@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import IsolationForest
+
+from analytics import FEATURE_COLUMNS, generate_baseline
+from forest_scorer import CompiledForest
+
+def _random_rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "snooze_delta": rng.normal(1, 1.5, n),
+            "daily_steps": rng.normal(7000, 3000, n),
+            "app_switch_rate": rng.normal(40, 15, n),
+            "pickup_count": rng.normal(80, 30, n),
+        }
+    )[FEATURE_COLUMNS]
+
+# max_features < 1.0 fits each tree on a feature subset, which the compiled
+# forest has to map back to the full feature index.
+@pytest.mark.parametrize("max_features", [1.0, 0.5])
+def test_decision_function_matches_sklearn(max_features):
+    forest = IsolationForest(n_estimators=50, max_features=max_features, random_state=7)
+    forest.fit(generate_baseline(days=200))
+    X = _random_rows(2000)
+
+    np.testing.assert_array_equal(CompiledForest(forest).decision_function(X), forest.decision_function(X))
+
+def test_score_one_matches_batch():
+    forest = IsolationForest(n_estimators=20, random_state=3).fit(generate_baseline(days=60))
+    scorer = CompiledForest(forest)
+    X = _random_rows(20, seed=1)
+
+    batch = scorer.decision_function(X)
+    assert [scorer.score_one(row) for row in X.to_numpy()] == list(batch)
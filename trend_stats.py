@@ -0,0 +1,129 @@
+import json
+import statistics
+from datetime import date
+
+from db import connection, register_schema
+
+SHORT_WINDOW_DAYS = 7
+LONG_WINDOW_DAYS = 30
+# A day counts towards the streak at this stability or above.
+STREAK_THRESHOLD = 80
+STAT_COLUMNS = ["ma7", "ma30", "streak", "volatility"]
+
+# trend_state holds what the next update needs (the last 30 days of values and
+# the current streak), so saving a day never rescans the user's history.
+# trend_stats keeps the computed values per day, next to the history rows.
+register_schema(
+    """
+    CREATE TABLE IF NOT EXISTS trend_state (
+        username TEXT PRIMARY KEY,
+        recent TEXT NOT NULL,
+        streak INTEGER NOT NULL,
+        prev_streak INTEGER NOT NULL
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS trend_stats (
+        username TEXT NOT NULL,
+        day TEXT NOT NULL,
+        ma7 REAL NOT NULL,
+        ma30 REAL NOT NULL,
+        streak INTEGER NOT NULL,
+        volatility REAL NOT NULL,
+        PRIMARY KEY (username, day)
+    ) WITHOUT ROWID;
+    """
+)
+
+_INSERT_STATS = "INSERT OR REPLACE INTO trend_stats (username, day, ma7, ma30, streak, volatility) VALUES (?, ?, ?, ?, ?, ?)"
+
+def _days_between(earlier, later):
+    return (date.fromisoformat(later) - date.fromisoformat(earlier)).days
+
+def _advance(state, day, value):
+    # Adds `day` (the newest so far, or the newest again to replace it) and
+    # returns the new state with that day's stats. The window holds at most
+    # LONG_WINDOW_DAYS entries, so this is constant time.
+    window = state["window"]
+    if window and window[-1][0] == day:
+        window = window[:-1]
+        base = state["prev_streak"]
+        prev_streak = state["prev_streak"]
+    else:
+        base = state["streak"]
+        prev_streak = state["streak"]
+    consecutive = bool(window) and _days_between(window[-1][0], day) == 1
+    if value >= STREAK_THRESHOLD:
+        streak = base + 1 if consecutive else 1
+    else:
+        streak = 0
+    window = [entry for entry in window if _days_between(entry[0], day) < LONG_WINDOW_DAYS]
+    window.append([day, value])
+
+    long_values = [v for _, v in window]
+    short_values = [v for d, v in window if _days_between(d, day) < SHORT_WINDOW_DAYS]
+    stats = {
+        "ma7": statistics.fmean(short_values),
+        "ma30": statistics.fmean(long_values),
+        "streak": streak,
+        "volatility": statistics.pstdev(long_values),
+    }
+    return {"window": window, "streak": streak, "prev_streak": prev_streak}, stats
+
+def _empty_state():
+    return {"window": [], "streak": 0, "prev_streak": 0}
+
+def _load_state(conn, username):
+    row = conn.execute(
+        "SELECT recent, streak, prev_streak FROM trend_state WHERE username = ?", (username,)
+    ).fetchone()
+    if row is None:
+        return None
+    return {"window": json.loads(row["recent"]), "streak": row["streak"], "prev_streak": row["prev_streak"]}
+
+def _save(conn, username, state, stat_rows):
+    conn.execute(
+        "INSERT OR REPLACE INTO trend_state (username, recent, streak, prev_streak) VALUES (?, ?, ?, ?)",
+        (username, json.dumps(state["window"]), state["streak"], state["prev_streak"]),
+    )
+    conn.executemany(
+        _INSERT_STATS,
+        ((username, day, *(stats[name] for name in STAT_COLUMNS)) for day, stats in stat_rows),
+    )
+
+def rebuild(conn, username):
+    # Recomputes every day from the history table, for backfills and for
+    # history saved before trend stats existed.
+    state = _empty_state()
+    stat_rows = []
+    for row in conn.execute(
+        "SELECT day, stability_index FROM history WHERE username = ? ORDER BY day", (username,)
+    ):
+        state, stats = _advance(state, row["day"], row["stability_index"])
+        stat_rows.append((row["day"], stats))
+    conn.execute("DELETE FROM trend_stats WHERE username = ?", (username,))
+    _save(conn, username, state, stat_rows)
+
+def record(conn, username, days):
+    # Called inside the transaction that wrote `days` (an iterable of
+    # (day, stability_index)) to history.
+    state = _load_state(conn, username)
+    if state is None:
+        rebuild(conn, username)
+        return
+    stat_rows = []
+    for day, value in days:
+        if state["window"] and day < state["window"][-1][0]:
+            # An earlier day changes every later average and streak.
+            rebuild(conn, username)
+            return
+        state, stats = _advance(state, day, value)
+        stat_rows.append((day, stats))
+    _save(conn, username, state, stat_rows)
+
+def get_recent_stats(username, limit):
+    # Newest `limit` days, returned oldest first.
+    with connection() as conn:
+        rows = conn.execute(
+            f"SELECT day, {', '.join(STAT_COLUMNS)} FROM trend_stats WHERE username = ? ORDER BY day DESC LIMIT ?",
+            (username, limit),
+        ).fetchall()
+    return [dict(row) for row in reversed(rows)]
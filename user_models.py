@@ -0,0 +1,100 @@
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from analytics import FEATURE_COLUMNS, get_scorer, train_isolation_forest
+from forest_scorer import CompiledForest
+from history_store import count_days, get_recent_days
+from model_registry import MODEL_DIR
+
+USER_MODEL_DIR = os.path.join(MODEL_DIR, "users")
+MIN_HISTORY_DAYS = 14
+RETRAIN_AFTER_NEW_DAYS = 7
+RETRAIN_INTERVAL_SECONDS = 7 * 24 * 3600
+TRAINING_WINDOW_DAYS = 90
+MAX_HOT_MODELS = 256
+
+_lock = threading.Lock()
+_hot = OrderedDict()
+
+def _model_path(username):
+    digest = hashlib.sha1(username.encode("utf-8")).hexdigest()
+    return os.path.join(USER_MODEL_DIR, digest[:2], f"{digest}.pkl")
+
+def _load(username):
+    try:
+        with open(_model_path(username), "rb") as f:
+            entry = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    entry["scorer"] = CompiledForest(entry["model"])
+    return entry
+
+def _save(username, entry):
+    path = _model_path(username)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump({k: v for k, v in entry.items() if k != "scorer"}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+def _remember(username, entry):
+    # Models are written to disk when trained, so evicting only drops them from memory.
+    with _lock:
+        _hot[username] = entry
+        _hot.move_to_end(username)
+        while len(_hot) > MAX_HOT_MODELS:
+            _hot.popitem(last=False)
+
+def _lookup(username):
+    with _lock:
+        entry = _hot.get(username)
+        if entry is not None:
+            _hot.move_to_end(username)
+            return entry
+    entry = _load(username)
+    if entry is not None:
+        _remember(username, entry)
+    return entry
+
+def _needs_retrain(entry, n_days):
+    if entry is None:
+        return True
+    new_days = n_days - entry["trained_days"]
+    if new_days >= RETRAIN_AFTER_NEW_DAYS:
+        return True
+    return new_days > 0 and time.time() - entry["trained_at"] >= RETRAIN_INTERVAL_SECONDS
+
+def _train(username, history, n_days):
+    # IsolationForest cannot be updated in place, so "incremental" means refitting
+    # on the most recent window once enough new days have arrived.
+    window = pd.DataFrame(history)[FEATURE_COLUMNS]
+    model = train_isolation_forest(window)
+    entry = {
+        "model": model,
+        "scorer": CompiledForest(model),
+        "trained_days": n_days,
+        "trained_at": time.time(),
+    }
+    _save(username, entry)
+    _remember(username, entry)
+    return entry
+
+def get_user_scorer(username):
+    n_days = count_days(username) if username else 0
+    if n_days < MIN_HISTORY_DAYS:
+        return get_scorer()
+    entry = _lookup(username)
+    if _needs_retrain(entry, n_days):
+        # Only read the training window when a refit is actually due.
+        entry = _train(username, get_recent_days(username, TRAINING_WINDOW_DAYS), n_days)
+    return entry["scorer"]
+
+def hot_model_count():
+    with _lock:
+        return len(_hot)
@@ -0,0 +1,127 @@
+import hashlib
+import hmac
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from db import connection, register_schema
+
+HASH_ITERATIONS = 200_000
+PROFILE_CACHE_SIZE = 1024
+PROFILE_FIELDS = ["full_name", "age", "email", "medical_history"]
+# The demo account every fresh install starts with.
+DEFAULT_USERS = {
+    "admin": {
+        "password": "1234",
+        "full_name": "System Administrator",
+        "age": 30,
+        "email": "admin@rhythmanchor.com",
+        "medical_history": "None",
+    }
+}
+
+# username is the primary key, so every lookup is a single index probe.
+register_schema(
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        username TEXT PRIMARY KEY,
+        password_hash TEXT NOT NULL,
+        full_name TEXT,
+        age INTEGER,
+        email TEXT,
+        medical_history TEXT,
+        created_at REAL NOT NULL
+    ) WITHOUT ROWID;
+    """
+)
+
+_profiles = OrderedDict()
+_profiles_lock = threading.Lock()
+_seeded = False
+
+def hash_password(password, salt=None, iterations=HASH_ITERATIONS):
+    salt = salt or os.urandom(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+    return f"pbkdf2_sha256${iterations}${salt.hex()}${digest.hex()}"
+
+def verify_password(password, stored):
+    _, iterations, salt, _ = stored.split("$")
+    return hmac.compare_digest(hash_password(password, bytes.fromhex(salt), int(iterations)), stored)
+
+def _insert_user(conn, username, password, full_name=None, age=25, email=None, medical_history=None):
+    conn.execute(
+        "INSERT INTO users (username, password_hash, full_name, age, email, medical_history, created_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (username, hash_password(password), full_name or username, age, email, medical_history, time.time()),
+    )
+
+def _ensure_seeded():
+    # Runs before any sign-up, so nobody can register a default username first.
+    global _seeded
+    if _seeded:
+        return
+    for username, profile in DEFAULT_USERS.items():
+        with connection() as conn:
+            exists = conn.execute("SELECT 1 FROM users WHERE username = ?", (username,)).fetchone()
+        if exists:
+            continue
+        try:
+            with connection() as conn, conn:
+                _insert_user(conn, username, profile["password"], **{k: profile[k] for k in PROFILE_FIELDS})
+        except sqlite3.IntegrityError:
+            # Another process seeded it first.
+            pass
+    _seeded = True
+
+def create_user(username, password, full_name=None, age=25, email=None, medical_history=None):
+    # Returns False if the username is already taken.
+    _ensure_seeded()
+    try:
+        with connection() as conn, conn:
+            _insert_user(conn, username, password, full_name, age, email, medical_history)
+    except sqlite3.IntegrityError:
+        return False
+    return True
+
+def authenticate(username, password):
+    _ensure_seeded()
+    with connection() as conn:
+        row = conn.execute("SELECT password_hash FROM users WHERE username = ?", (username,)).fetchone()
+    if row is None:
+        # Hash anyway so an unknown username takes as long as a wrong password.
+        hash_password(password)
+        return False
+    return verify_password(password, row["password_hash"])
+
+def get_profile(username):
+    _ensure_seeded()
+    with _profiles_lock:
+        if username in _profiles:
+            _profiles.move_to_end(username)
+            return dict(_profiles[username])
+    with connection() as conn:
+        row = conn.execute(
+            f"SELECT {', '.join(PROFILE_FIELDS)} FROM users WHERE username = ?", (username,)
+        ).fetchone()
+    if row is None:
+        return None
+    profile = dict(row)
+    with _profiles_lock:
+        _profiles[username] = profile
+        while len(_profiles) > PROFILE_CACHE_SIZE:
+            _profiles.popitem(last=False)
+    return dict(profile)
+
+def update_profile(username, **fields):
+    unknown = set(fields) - set(PROFILE_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown profile fields: {', '.join(sorted(unknown))}")
+    if not fields:
+        return
+    assignments = ", ".join(f"{name} = ?" for name in fields)
+    with connection() as conn, conn:
+        conn.execute(f"UPDATE users SET {assignments} WHERE username = ?", (*fields.values(), username))
+    with _profiles_lock:
+        _profiles.pop(username, None)